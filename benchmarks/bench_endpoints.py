@@ -0,0 +1,659 @@
+#!/usr/bin/env python3
+"""
+Benchmark das rotas da API com atletas sintéticos
+
+Popula um banco com usuários, planos, treinos (parte completos), feedbacks,
+exames e jobs sintéticos e exercita cada rota de ``training_bp``: pelo test
+client do Flask (padrão, com contagem de consultas SQL por requisição) ou por
+HTTP com várias threads contra um servidor já rodando (gunicorn). Reporta
+p50/p95/p99, throughput e consultas por rota; os resultados podem ser salvos
+como baseline (benchmarks/baselines/) e comparados em execuções seguintes.
+
+Uso:
+    python benchmarks/bench_endpoints.py [--users 200 --weeks 12 --requests 200]
+    python benchmarks/bench_endpoints.py --save-baseline benchmarks/baselines/sqlite-testclient.json
+    python benchmarks/bench_endpoints.py --compare benchmarks/baselines/sqlite-testclient.json
+
+    # Contra o gunicorn: popula um banco, sobe o servidor nele e mede por HTTP
+    python benchmarks/bench_endpoints.py --seed-only --database-url sqlite:////tmp/bench.db
+    DATABASE_URL=sqlite:////tmp/bench.db PLAN_JOB_WORKERS=0 gunicorn -w 4 main:app
+    python benchmarks/bench_endpoints.py --url http://localhost:8000 --database-url sqlite:////tmp/bench.db --threads 8
+"""
+import argparse
+import io
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BATCH_SIZE = 20  # treinos por requisição em complete-batch
+NOISE_FLOOR_MS = 1.0  # diferenças de latência menores que isso não contam como regressão
+
+NIVEIS = ('iniciante', 'intermediário', 'avançado')
+DISTANCIAS = (5.0, 10.0, 21.1, 42.2)
+EXAMES = {
+    'bioimpedancia': lambda rng: {'percentual_gordura': round(rng.uniform(8, 30), 1),
+                                  'taxa_metabolica_basal': rng.randint(1300, 2100)},
+    'espirometria': lambda rng: {'relacao_vef1_cvf': rng.randint(65, 95)},
+    'vo2max': lambda rng: {'vo2max': round(rng.uniform(35, 65), 1)},
+}
+
+# Requisição a enviar; files: {campo: (nome, bytes, content type)}
+Call = namedtuple('Call', 'method path json form files headers', defaults=(None, None, None, None))
+Scenario = namedtuple('Scenario', 'endpoint label build')
+
+SCENARIOS = []
+
+
+def scenario(endpoint, label):
+    """Registra ``build(ctx, i) -> Call`` para a rota ``endpoint``"""
+    def decorator(build):
+        SCENARIOS.append(Scenario(endpoint, label, build))
+        return build
+    return decorator
+
+
+# --- Dados sintéticos --------------------------------------------------------
+
+def synthetic_profile(rng, weeks):
+    distancia = rng.choice(DISTANCIAS)
+    teste_5km = rng.uniform(19, 36)
+    return {
+        'idade': rng.randint(18, 65),
+        'peso': round(rng.uniform(48, 98), 1),
+        'sexo': rng.choice('MF'),
+        'nivel': rng.choice(NIVEIS),
+        'distancia_objetivo': distancia,
+        'tempo_objetivo_min': int(teste_5km / 5 * distancia * rng.uniform(1.0, 1.15)),
+        'semanas_treino': weeks,
+        'dias_semana': rng.randint(3, 6),
+        'teste_5km_tempo': round(teste_5km, 1),
+        'teste_5km_fc_media': float(rng.randint(150, 188)),
+        'teste_5km_rpe': rng.randint(6, 9),
+    }
+
+
+def seed_database(app, args):
+    """Popula o banco do app. Retorna o número de linhas gravadas por tabela."""
+    from sqlalchemy import insert, select, update
+
+    from src.models.user import db, User, TrainingPlan, Workout, UserFeedback, UserExam, PlanJob
+    from src.services.progress import rebuild_user_progress
+    from src.services.training_ai import TrainingAIService, user_plan_data
+    from src.services.training_load import rebuild_training_load
+
+    rng = random.Random(args.seed)
+    service = TrainingAIService()
+    fresh = fresh_pool_sizes(args)
+    total_users = args.users + fresh['week'] + fresh['season']
+    counts = {}
+
+    with app.app_context():
+        # Atletas com temporada gerada primeiro; os "novos" (sem planos) no fim
+        db.session.execute(insert(User), [synthetic_profile(rng, args.weeks) for _ in range(total_users)])
+        full_ids = db.session.scalars(select(User.id).order_by(User.id).limit(args.users)).all()
+        counts['users'] = total_users
+
+        plans = []
+        for user in User.query.filter(User.id.in_(full_ids)):
+            for plan in service.build_season_plan(user_plan_data(user)):
+                plan['user_id'] = user.id
+                plans.append(plan)
+            if len(plans) >= 500:
+                service.persist_season_plans(None, plans)
+                plans = []
+        service.persist_season_plans(None, plans)
+        counts['training_plans'] = len(full_ids) * args.weeks
+
+        # Semanas já passadas: parte dos treinos completos, datados na semana/dia do plano
+        season_start = datetime.utcnow().replace(hour=7, minute=0, second=0, microsecond=0) \
+            - timedelta(weeks=args.weeks)
+        workouts = db.session.execute(
+            select(Workout.id, TrainingPlan.semana, Workout.dia, Workout.distancia_km, Workout.ritmo_alvo)
+            .join(TrainingPlan, TrainingPlan.id == Workout.training_plan_id)
+        ).all()
+        counts['workouts'] = len(workouts)
+        completions = [
+            {
+                'id': w.id,
+                'completed': True,
+                'completed_at': season_start + timedelta(days=(w.semana - 1) * 7 + w.dia - 1),
+                'rpe_realizado': rng.randint(3, 9),
+                'fc_media': float(rng.randint(125, 178)),
+                'tempo_realizado': round(w.distancia_km * w.ritmo_alvo * rng.uniform(0.95, 1.08), 1),
+            }
+            for w in workouts if rng.random() < args.completed
+        ]
+        if completions:
+            db.session.execute(update(Workout), completions)
+
+        feedbacks = [
+            {
+                'user_id': uid, 'semana': semana, 'consistencia': rng.randint(2, 6),
+                'rpe_medio': round(rng.uniform(4, 8), 1), 'fc_medio': float(rng.randint(135, 170)),
+                'observacoes': 'Feedback sintético',
+                'created_at': season_start + timedelta(weeks=semana),
+            }
+            for uid in full_ids for semana in range(1, args.feedback + 1)
+        ]
+        exams = [
+            {
+                'user_id': uid, 'tipo_exame': tipo, 'dados_exame': json.dumps(EXAMES[tipo](rng)),
+                'data_exame': season_start - timedelta(days=rng.randint(0, 365)),
+            }
+            for uid in full_ids for tipo in rng.choices(list(EXAMES), k=args.exams)
+        ]
+        jobs = [
+            {
+                'user_id': uid, 'tipo': 'temporada', 'status': 'done', 'attempts': 1,
+                'weeks_total': args.weeks, 'weeks_done': args.weeks,
+                'result': json.dumps({'weeks_created': list(range(1, args.weeks + 1))}),
+                'created_at': season_start, 'started_at': season_start, 'finished_at': season_start,
+            }
+            for uid in full_ids
+        ]
+        for model, rows in ((UserFeedback, feedbacks), (UserExam, exams), (PlanJob, jobs)):
+            if rows:
+                db.session.execute(insert(model), rows)
+            counts[model.__tablename__] = len(rows)
+
+        # Tabelas derivadas recalculadas como no CLI
+        counts['user_progress'] = rebuild_user_progress()
+        counts['training_load'] = rebuild_training_load()
+        db.session.commit()
+    return counts
+
+
+def fresh_pool_sizes(args):
+    """Atletas sem planos consumidos pelas rotas de geração (uma semana/temporada cada)"""
+    calls = args.requests + args.warmup
+    return {'week': math.ceil(calls / args.weeks) + 1, 'season': calls + 1}
+
+
+def load_context(app, args):
+    """Ids usados pelos cenários, lidos do banco já populado"""
+    from sqlalchemy import exists, select
+
+    from src.models.user import db, User, TrainingPlan, Workout, PlanJob
+
+    with app.app_context():
+        has_plans = exists().where(TrainingPlan.user_id == User.id)
+        full = db.session.scalars(select(User.id).where(has_plans).order_by(User.id)).all()
+        fresh = db.session.scalars(select(User.id).where(~has_plans).order_by(User.id)).all()
+        pending = db.session.execute(
+            select(Workout.id, Workout.user_id, Workout.distancia_km, Workout.ritmo_alvo)
+            .where(Workout.completed.is_(False))
+            .order_by(Workout.id)
+        ).all()
+        jobs = db.session.scalars(select(PlanJob.id).order_by(PlanJob.id)).all()
+        weeks = db.session.scalar(select(User.semanas_treino).limit(1)) or args.weeks
+
+    if not full:
+        raise SystemExit("❌ Banco sem atletas com planos: rode com --seed-only (ou sem --url) antes")
+
+    rng = random.Random(args.seed)
+    pending = list(pending)
+    rng.shuffle(pending)
+    split = fresh_pool_sizes(args)['week']
+    return {
+        'rng': rng,
+        'users': full,
+        'weeks': weeks,
+        # Cada geração consome um par (atleta novo, semana) ou um atleta novo
+        'fresh_weeks': iter([(uid, week) for uid in fresh[:split] for week in range(1, weeks + 1)]),
+        'fresh_seasons': iter(fresh[split:]),
+        'pending': itertools.cycle(pending) if pending else None,
+        'jobs': jobs,
+        'pdfs': [],
+        'lock': threading.Lock(),
+    }
+
+
+def take(ctx, key):
+    with ctx['lock']:
+        try:
+            return next(ctx[key])
+        except StopIteration:
+            raise SystemExit(f"❌ Atletas novos insuficientes para '{key}': aumente a semeadura") from None
+
+
+def user_for(ctx, i):
+    return ctx['users'][i % len(ctx['users'])]
+
+
+def gpx_for(workout, rng):
+    """Atividade GPX com a distância e o ritmo do treino (um ponto a cada 5 s)"""
+    speed = 1000 / (workout.ritmo_alvo * 60)  # m/s
+    points = max(2, int(workout.distancia_km * 1000 / speed / 5))
+    start = datetime(2026, 5, 1, 6, 0, 0)
+    lat0, lon0 = -23.55, -46.63
+    step = speed * 5 / 111320  # graus de latitude a cada 5 s
+    trkpts = ''.join(
+        f'<trkpt lat="{lat0 + k * step:.6f}" lon="{lon0:.6f}">'
+        f'<time>{(start + timedelta(seconds=5 * k)).isoformat()}Z</time>'
+        f'<extensions><hr>{140 + rng.randint(0, 20)}</hr></extensions></trkpt>'
+        for k in range(points)
+    )
+    return f'<?xml version="1.0"?><gpx><trk><trkseg>{trkpts}</trkseg></trk></gpx>'.encode('utf-8')
+
+
+# --- Cenários (um por rota de training_bp, mais variantes) -------------------
+
+@scenario('training.create_user', 'POST /users')
+def _create_user(ctx, i):
+    return Call('POST', '/api/users', json=synthetic_profile(ctx['rng'], ctx['weeks']))
+
+
+@scenario('training.get_user', 'GET /users/:id')
+def _get_user(ctx, i):
+    return Call('GET', f'/api/users/{user_for(ctx, i)}')
+
+
+@scenario('training.generate_training_plan', 'POST /users/:id/training-plan/:week')
+def _generate_week(ctx, i):
+    user_id, week = take(ctx, 'fresh_weeks')
+    return Call('POST', f'/api/users/{user_id}/training-plan/{week}')
+
+
+@scenario('training.generate_season_plan', 'POST /users/:id/training-plans/season')
+def _generate_season(ctx, i):
+    return Call('POST', f"/api/users/{take(ctx, 'fresh_seasons')}/training-plans/season")
+
+
+@scenario('training.get_plan_job', 'GET /jobs/:id')
+def _get_job(ctx, i):
+    return Call('GET', f"/api/jobs/{ctx['jobs'][i % len(ctx['jobs'])]}")
+
+
+@scenario('training.get_user_training_plans', 'GET /users/:id/training-plans')
+def _get_plans(ctx, i):
+    return Call('GET', f'/api/users/{user_for(ctx, i)}/training-plans')
+
+
+@scenario('training.get_user_training_plans', 'GET /users/:id/training-plans?fields=')
+def _get_plans_fields(ctx, i):
+    return Call('GET', f'/api/users/{user_for(ctx, i)}/training-plans?fields=id,dia,tipo,distancia_km,completed')
+
+
+@scenario('training.complete_workout', 'POST /workouts/:id/complete')
+def _complete(ctx, i):
+    workout = take(ctx, 'pending')
+    rng = ctx['rng']
+    return Call('POST', f'/api/workouts/{workout.id}/complete', json={
+        'rpe_realizado': rng.randint(3, 9), 'fc_media': rng.randint(125, 178),
+        'tempo_realizado': round(workout.distancia_km * workout.ritmo_alvo, 1),
+    })
+
+
+@scenario('training.complete_workouts_batch', f'POST /workouts/complete-batch ({BATCH_SIZE})')
+def _complete_batch(ctx, i):
+    rng = ctx['rng']
+    with ctx['lock']:
+        workouts = {w.id: w for w in itertools.islice(ctx['pending'], BATCH_SIZE)}
+    return Call('POST', '/api/workouts/complete-batch', json={'workouts': [
+        {'id': w.id, 'rpe_realizado': rng.randint(3, 9), 'fc_media': rng.randint(125, 178),
+         'tempo_realizado': round(w.distancia_km * w.ritmo_alvo, 1)}
+        for w in workouts.values()
+    ]})
+
+
+@scenario('training.import_activity', 'POST /users/:id/activities (GPX)')
+def _import_activity(ctx, i):
+    workout = take(ctx, 'pending')
+    return Call('POST', f'/api/users/{workout.user_id}/activities',
+                form={'workout_id': str(workout.id), 'rpe_realizado': '6'},
+                files={'activity_file': ('atividade.gpx', gpx_for(workout, ctx['rng']), 'application/gpx+xml')})
+
+
+@scenario('training.submit_feedback', 'POST /users/:id/feedback')
+def _submit_feedback(ctx, i):
+    rng = ctx['rng']
+    return Call('POST', f'/api/users/{user_for(ctx, i)}/feedback', json={
+        'semana': rng.randint(1, ctx['weeks']), 'consistencia': rng.randint(2, 6),
+        'rpe_medio': round(rng.uniform(4, 8), 1), 'fc_medio': rng.randint(135, 170),
+    })
+
+
+@scenario('training.get_user_feedbacks', 'GET /users/:id/feedback')
+def _get_feedback(ctx, i):
+    return Call('GET', f'/api/users/{user_for(ctx, i)}/feedback')
+
+
+@scenario('training.add_user_exam', 'POST /users/:id/exams')
+def _add_exam(ctx, i):
+    tipo = ctx['rng'].choice(list(EXAMES))
+    return Call('POST', f'/api/users/{user_for(ctx, i)}/exams', json={
+        'tipo_exame': tipo, 'dados_exame': EXAMES[tipo](ctx['rng']), 'data_exame': '2026-03-01',
+    })
+
+
+@scenario('training.get_user_exams', 'GET /users/:id/exams')
+def _get_exams(ctx, i):
+    return Call('GET', f'/api/users/{user_for(ctx, i)}/exams')
+
+
+@scenario('training.upload_exam_pdf', 'POST /users/:id/exams/upload-pdf')
+def _upload_pdf(ctx, i):
+    # Conteúdo único por requisição (PDFs iguais seriam deduplicados pelo hash)
+    pdf = b'%PDF-1.4\n%' + uuid.uuid4().hex.encode() + b'\n' + b'0' * 32 * 1024 + b'\n%%EOF\n'
+    return Call('POST', f'/api/users/{user_for(ctx, i)}/exams/upload-pdf',
+                form={'tipo_exame': 'bioimpedancia', 'data_exame': '2026-03-01'},
+                files={'pdf_file': ('exame.pdf', pdf, 'application/pdf')})
+
+
+@scenario('training.download_exam_pdf', 'GET /exams/pdf/:filename')
+def _download_pdf(ctx, i):
+    if not ctx['pdfs']:
+        return None  # depende dos uploads do cenário anterior
+    return Call('GET', f"/api/exams/pdf/{ctx['pdfs'][i % len(ctx['pdfs'])]}")
+
+
+@scenario('training.get_user_progress', 'GET /users/:id/progress')
+def _get_progress(ctx, i):
+    return Call('GET', f'/api/users/{user_for(ctx, i)}/progress')
+
+
+@scenario('training.get_training_load', 'GET /users/:id/load')
+def _get_load(ctx, i):
+    return Call('GET', f'/api/users/{user_for(ctx, i)}/load')
+
+
+# --- Transportes -------------------------------------------------------------
+
+class TestClientTransport:
+    """Test client do Flask no mesmo processo; conta as consultas de cada requisição"""
+
+    counts_queries = True
+
+    def __init__(self, app):
+        from sqlalchemy import event
+
+        from src.models.user import db
+
+        self.client = app.test_client()
+        self.queries = 0
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self.queries += 1
+
+    def send(self, call):
+        self.queries = 0
+        data = dict(call.form or {})
+        for field, (filename, content, content_type) in (call.files or {}).items():
+            data[field] = (io.BytesIO(content), filename, content_type)
+        response = self.client.open(
+            call.path, method=call.method, json=call.json, headers=call.headers,
+            data=data or None, content_type='multipart/form-data' if call.files else None
+        )
+        return response.status_code, response.get_json(silent=True), self.queries
+
+
+class HttpTransport:
+    """HTTP contra um servidor rodando (gunicorn); sem contagem de consultas"""
+
+    counts_queries = False
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def send(self, call):
+        headers = dict(call.headers or {})
+        body = None
+        if call.files:
+            boundary = uuid.uuid4().hex
+            body = encode_multipart(call.form or {}, call.files, boundary)
+            headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+        elif call.json is not None:
+            body = json.dumps(call.json).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        request = urllib.request.Request(self.base_url + call.path, data=body, headers=headers, method=call.method)
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                status, payload = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, payload = e.code, e.read()
+        try:
+            parsed = json.loads(payload)
+        except ValueError:
+            parsed = None
+        return status, parsed, None
+
+
+def encode_multipart(form, files, boundary):
+    parts = []
+    for name, value in form.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content, content_type) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'.encode() + content + b'\r\n'
+        )
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts)
+
+
+# --- Execução e relatório ----------------------------------------------------
+
+def percentile(sorted_values, p):
+    """Percentil por posto mais próximo"""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(p / 100 * len(sorted_values)) - 1))]
+
+
+def run_scenario(transport, ctx, scn, args):
+    """Aquecimento e medição de um cenário. Retorna o resumo ou None se não se aplica."""
+
+    def one(i):
+        call = scn.build(ctx, i)
+        if call is None:
+            return None
+        start = time.perf_counter()
+        status, payload, queries = transport.send(call)
+        elapsed = (time.perf_counter() - start) * 1000
+        if scn.endpoint == 'training.upload_exam_pdf' and status == 201:
+            with ctx['lock']:
+                ctx['pdfs'].append(payload['exam']['pdf_filename'])
+        return elapsed, status, queries
+
+    for i in range(args.warmup):
+        one(i)
+
+    started = time.perf_counter()
+    if args.threads > 1:
+        with ThreadPoolExecutor(args.threads) as pool:
+            samples = list(pool.map(one, range(args.warmup, args.warmup + args.requests)))
+    else:
+        samples = [one(i) for i in range(args.warmup, args.warmup + args.requests)]
+    wall = time.perf_counter() - started
+
+    samples = [s for s in samples if s is not None]
+    if not samples:
+        return None
+    latencies = sorted(s[0] for s in samples)
+    errors = sum(1 for s in samples if s[1] >= 400)
+    queries = [s[2] for s in samples if s[2] is not None]
+    return {
+        'endpoint': scn.endpoint,
+        'requests': len(samples),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'rps': round(len(samples) / wall, 1),
+        'queries': round(sum(queries) / len(queries), 2) if queries else None,
+        'errors': errors,
+        'statuses': sorted({s[1] for s in samples}),
+    }
+
+
+def print_report(results, baseline=None):
+    header = f"{'rota':<46} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8} {'SQL':>6} {'erros':>6}"
+    print(header)
+    print('-' * len(header))
+    for label, r in results.items():
+        queries = f"{r['queries']:.1f}" if r['queries'] is not None else '-'
+        print(f"{label:<46} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+              f"{r['rps']:>8.1f} {queries:>6} {r['errors']:>6}")
+        old = (baseline or {}).get(label)
+        if old:
+            delta = (r['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100 if old['p95_ms'] else 0.0
+            print(f"{'  baseline':<46} {old['p50_ms']:>8.2f} {old['p95_ms']:>8.2f} {old['p99_ms']:>8.2f} "
+                  f"{old['rps']:>8.1f} {old['queries'] if old['queries'] is not None else '-':>6}"
+                  f"   p95 {delta:+.0f}%")
+
+
+def regressions(results, baseline, tolerance):
+    """Rotas mais lentas que o baseline (p95 acima da tolerância) ou com mais consultas"""
+    found = []
+    for label, r in results.items():
+        old = baseline.get(label)
+        if not old:
+            continue
+        limit = max(old['p95_ms'] * (1 + tolerance), old['p95_ms'] + NOISE_FLOOR_MS)
+        if r['p95_ms'] > limit:
+            found.append(f"{label}: p95 {r['p95_ms']:.2f} ms > {limit:.2f} ms")
+        if r['queries'] is not None and old.get('queries') is not None and r['queries'] > old['queries'] + 0.01:
+            found.append(f"{label}: {r['queries']:.1f} consultas > {old['queries']:.1f}")
+        if r['errors'] > old.get('errors', 0):
+            found.append(f"{label}: {r['errors']} erros (baseline {old.get('errors', 0)})")
+    return found
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    seeding = parser.add_argument_group('dados sintéticos')
+    seeding.add_argument('--users', type=int, default=200, help='Atletas com temporada gerada')
+    seeding.add_argument('--weeks', type=int, default=12, help='Semanas por temporada')
+    seeding.add_argument('--completed', type=float, default=0.5, help='Fração dos treinos já completos')
+    seeding.add_argument('--feedback', type=int, default=6, help='Feedbacks por atleta')
+    seeding.add_argument('--exams', type=int, default=4, help='Exames por atleta')
+    seeding.add_argument('--seed', type=int, default=42, help='Semente do gerador aleatório')
+    parser.add_argument('--requests', type=int, default=200, help='Requisições medidas por rota')
+    parser.add_argument('--warmup', type=int, default=10, help='Requisições de aquecimento por rota')
+    parser.add_argument('--only', help='Regex: mede só as rotas cujo rótulo ou endpoint combina')
+    parser.add_argument('--database-url', help='Banco a usar (padrão: SQLite temporário)')
+    parser.add_argument('--seed-only', action='store_true', help='Apenas popula --database-url e sai')
+    parser.add_argument('--url', help='Mede por HTTP neste servidor (banco já populado em --database-url)')
+    parser.add_argument('--threads', type=int, default=1, help='Requisições concorrentes (somente com --url)')
+    parser.add_argument('--save-baseline', metavar='ARQUIVO', help='Grava os resultados como baseline')
+    parser.add_argument('--compare', metavar='ARQUIVO', help='Compara com um baseline salvo')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='Aumento de p95 tolerado na comparação')
+    args = parser.parse_args()
+    if args.threads > 1 and not args.url:
+        parser.error('--threads só vale com --url (o test client roda em uma thread)')
+    if (args.url or args.seed_only) and not args.database_url:
+        parser.error('--url e --seed-only precisam de --database-url')
+    return args
+
+
+def main():
+    args = parse_args()
+    for name in ('save_baseline', 'compare'):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+
+    # Uploads (uploads/exams) e o SQLite temporário ficam fora do repositório
+    workdir = tempfile.mkdtemp(prefix='bench-endpoints-')
+    os.chdir(workdir)
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    from src.app import create_app
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'AUTO_MIGRATE': True,
+        'RESPONSE_CACHE_SIZE': 0,
+    })
+
+    if not args.url:
+        start = time.perf_counter()
+        counts = seed_database(app, args)
+        elapsed = time.perf_counter() - start
+        print(f"🌱 Banco populado em {elapsed:.1f}s: " + ', '.join(f'{n} {t}' for t, n in counts.items()))
+        if args.seed_only:
+            print(f"✅ Pronto: suba o servidor com DATABASE_URL={database_url} e rode com --url")
+            return 0
+
+    ctx = load_context(app, args)
+    transport = HttpTransport(args.url) if args.url else TestClientTransport(app)
+
+    endpoints = sorted(
+        rule.endpoint for rule in app.url_map.iter_rules() if rule.endpoint.startswith('training.')
+    )
+    missing = sorted(set(endpoints) - {scn.endpoint for scn in SCENARIOS})
+    if missing:
+        print(f"⚠️  Rotas sem cenário: {', '.join(missing)}")
+
+    pattern = re.compile(args.only) if args.only else None
+    results = {}
+    for scn in SCENARIOS:
+        if pattern and not (pattern.search(scn.label) or pattern.search(scn.endpoint)):
+            continue
+        result = run_scenario(transport, ctx, scn, args)
+        if result is None:
+            print(f"⏭️  {scn.label}: sem dados para medir")
+            continue
+        results[scn.label] = result
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            saved = json.load(f)
+        baseline = saved['endpoints']
+        changed = [k for k, v in saved['meta']['params'].items() if getattr(args, k) != v]
+        if changed:
+            print(f"⚠️  Parâmetros diferentes do baseline: {', '.join(changed)}")
+
+    transport_name = f'http x{args.threads}' if args.url else 'test client'
+    print(f"\n⏱️  Latência em ms ({args.requests} requisições por rota, {transport_name})\n")
+    print_report(results, baseline)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, 'w') as f:
+            json.dump({
+                'meta': {
+                    'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+                    'transport': transport_name,
+                    'database': database_url.split(':', 1)[0],
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'params': {k: getattr(args, k) for k in
+                               ('users', 'weeks', 'completed', 'feedback', 'exams', 'seed', 'requests', 'warmup')},
+                },
+                'endpoints': results,
+            }, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f"\n💾 Baseline gravado em {args.save_baseline}")
+
+    if baseline is not None:
+        found = regressions(results, baseline, args.tolerance)
+        if found:
+            print()
+            for item in found:
+                print(f"❌ {item}")
+            return 1
+        print(f"\n✅ Sem regressões em relação a {args.compare}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de TrainingAIService.generate_workout
+
+Compara o custo por treino da implementação anterior (dicionário com os oito
+treinos, ajustes de fase e limite mínimo aplicados a todos) com a tabela de
+coeficientes pré-compilada, e da temporada vetorizada em build_season_plan
+(com e sem os templates de semana em cache).
+
+Uso:
+    python benchmarks/bench_generate_workout.py [--n 200000]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.training_ai import PHASES, TrainingAIService, WORKOUT_TYPES
+
+
+def legacy_generate_workout(workout_type, week_number, phase, volume_semanal, ritmos, performance_factor):
+    """Implementação anterior (monta e ajusta os 8 treinos para devolver um)"""
+    # Volume base para cada tipo de treino
+    base_volumes = {
+        'regenerativo': volume_semanal * 0.15,
+        'fácil': volume_semanal * 0.2,
+        'longo': volume_semanal * 0.35,
+        'progressivo': volume_semanal * 0.25,
+        'fartlek': volume_semanal * 0.25,
+        'tempo': volume_semanal * 0.2,
+        'intervalo': volume_semanal * 0.15,
+        'ritmo': volume_semanal * 0.2
+    }
+
+    # Definir treinos específicos para cada tipo
+    workouts = {
+        'regenerativo': {
+            'tipo': 'regenerativo',
+            'descricao': 'Corrida regenerativa para recuperação ativa',
+            'distancia_km': base_volumes['regenerativo'] * performance_factor,
+            'ritmo_alvo': ritmos['ritmo_facil'] * 1.1
+        },
+        'fácil': {
+            'tipo': 'fácil',
+            'descricao': 'Corrida contínua em ritmo conversável',
+            'distancia_km': base_volumes['fácil'] * performance_factor,
+            'ritmo_alvo': ritmos['ritmo_facil']
+        },
+        'longo': {
+            'tipo': 'longo',
+            'descricao': 'Corrida longa para desenvolvimento de resistência',
+            'distancia_km': base_volumes['longo'] * performance_factor,
+            'ritmo_alvo': ritmos['ritmo_longo']
+        },
+        'progressivo': {
+            'tipo': 'progressivo',
+            'descricao': 'Corrida que inicia fácil e termina em ritmo moderado',
+            'distancia_km': base_volumes['progressivo'] * performance_factor,
+            'ritmo_alvo': (ritmos['ritmo_facil'] + ritmos['ritmo_tempo']) / 2
+        },
+        'fartlek': {
+            'tipo': 'fartlek',
+            'descricao': 'Treino de velocidade com variações de ritmo livre',
+            'distancia_km': base_volumes['fartlek'] * performance_factor,
+            'ritmo_alvo': ritmos['ritmo_intervalo']
+        },
+        'tempo': {
+            'tipo': 'tempo',
+            'descricao': 'Treino contínuo no limiar de lactato',
+            'distancia_km': base_volumes['tempo'] * performance_factor,
+            'ritmo_alvo': ritmos['ritmo_tempo']
+        },
+        'intervalo': {
+            'tipo': 'intervalo',
+            'descricao': 'Repetições de alta intensidade com recuperação',
+            'distancia_km': base_volumes['intervalo'] * performance_factor,
+            'ritmo_alvo': ritmos['ritmo_intervalo']
+        },
+        'ritmo': {
+            'tipo': 'ritmo',
+            'descricao': 'Treino específico no ritmo de prova',
+            'distancia_km': base_volumes['ritmo'] * performance_factor,
+            'ritmo_alvo': ritmos['ritmo_ritmo']
+        }
+    }
+
+    # Ajustar baseado na fase de treinamento
+    if phase == "base":
+        workouts['longo']['distancia_km'] *= 0.9
+        workouts['ritmo']['distancia_km'] *= 0.7
+    elif phase == "construção":
+        workouts['longo']['distancia_km'] *= 1.0
+        workouts['ritmo']['distancia_km'] *= 0.8
+    elif phase == "intensificação":
+        workouts['longo']['distancia_km'] *= 1.1
+        workouts['ritmo']['distancia_km'] *= 1.0
+    else:  # tapering
+        workouts['longo']['distancia_km'] *= 0.7
+        workouts['ritmo']['distancia_km'] *= 0.8
+
+    # Garantir que a distância mínima seja respeitada
+    for workout in workouts.values():
+        workout['distancia_km'] = max(3.0, workout['distancia_km'])
+
+    return workouts[workout_type]
+
+
+def check_equivalence(service, ritmos):
+    """Garante que a tabela reproduz a implementação anterior"""
+    for phase in PHASES:
+        for tipo in WORKOUT_TYPES:
+            for volume in (10.0, 28.5, 70.0):
+                old = legacy_generate_workout(tipo, 1, phase, volume, ritmos, 1.1)
+                new = service.generate_workout(tipo, 1, phase, volume, ritmos, 1.1)
+                assert old['tipo'] == new['tipo'] and old['descricao'] == new['descricao']
+                assert abs(old['distancia_km'] - new['distancia_km']) < 1e-9, (phase, tipo, volume)
+                assert abs(old['ritmo_alvo'] - new['ritmo_alvo']) < 1e-9, (phase, tipo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n', type=int, default=200000, help='Treinos gerados por medição')
+    args = parser.parse_args()
+
+    service = TrainingAIService()
+    user_data = {
+        'id': None, 'nivel': 'intermediário', 'semanas_treino': 16, 'dias_semana': 5,
+        'performance_factor': 1.0, 'teste_5km_tempo': 25.0,
+        'tempo_objetivo_min': 110, 'distancia_objetivo': 21.1
+    }
+    ritmos = service.calculate_training_paces(user_data)
+    check_equivalence(service, ritmos)
+
+    calls = [(tipo, phase) for phase in PHASES for tipo in WORKOUT_TYPES]
+    repeat = max(1, args.n // len(calls))
+
+    def run_legacy():
+        for tipo, phase in calls:
+            legacy_generate_workout(tipo, 5, phase, 32.0, ritmos, 1.05)
+
+    def run_table():
+        for tipo, phase in calls:
+            service.generate_workout(tipo, 5, phase, 32.0, ritmos, 1.05)
+
+    total = repeat * len(calls)
+    legacy_s = min(timeit.repeat(run_legacy, number=repeat, repeat=3))
+    table_s = min(timeit.repeat(run_table, number=repeat, repeat=3))
+
+    def run_season_cold():
+        service.plan_templates.clear()
+        service.build_season_plan(user_data)
+
+    seasons = max(1, args.n // (16 * 5))
+    season_s = min(timeit.repeat(run_season_cold, number=seasons, repeat=3))
+    cached_s = min(timeit.repeat(lambda: service.build_season_plan(user_data), number=seasons, repeat=3))
+
+    print(f"generate_workout anterior: {legacy_s / total * 1e6:8.3f} µs/treino")
+    print(f"generate_workout tabela:   {table_s / total * 1e6:8.3f} µs/treino "
+          f"({legacy_s / table_s:.1f}x mais rápido)")
+    print(f"build_season_plan:         {season_s / (seasons * 16 * 5) * 1e6:8.3f} µs/treino "
+          f"(temporada de 16 semanas x 5 dias)")
+    print(f"build_season_plan (cache): {cached_s / (seasons * 16 * 5) * 1e6:8.3f} µs/treino "
+          f"(templates de semana reaproveitados)")
+
+
+if __name__ == '__main__':
+    main()
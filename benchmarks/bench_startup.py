@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark de cold start: tempo de `import main` e memória (RSS) por processo
+
+Cada medição roda em um processo Python novo, como um worker do gunicorn
+importando main:app, contra um SQLite temporário já migrado (a migração não
+entra na conta de tempo e memória). Compara a mediana com
+benchmarks/startup_budget.json e sai com código 1 se o tempo ou a memória
+passarem do orçamento, ou se algum módulo proibido (NumPy, pandas) for carregado
+na inicialização - inclusive na primeira, que cria e migra o banco novo.
+
+Uso:
+    python benchmarks/bench_startup.py [--runs 7]
+    python benchmarks/bench_startup.py --update-budget   # grava o orçamento a partir desta máquina
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_FILE = os.path.join(ROOT, 'benchmarks', 'startup_budget.json')
+DEFAULT_FORBIDDEN = ['numpy', 'pandas']
+BUDGET_MARGIN = 0.25  # folga sobre a medição ao gravar o orçamento
+
+# Executado em cada processo filho
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == 'darwin':
+    rss_kb //= 1024  # macOS informa em bytes
+print(json.dumps({
+    'import_ms': elapsed * 1000,
+    'rss_mb': rss_kb / 1024,
+    'modules': sorted(name for name in sys.modules if '.' not in name),
+}))
+"""
+
+
+def measure(env):
+    """Uma medição em processo novo"""
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE], cwd=ROOT, env=env, check=True,
+        capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def load_budget():
+    if not os.path.exists(BUDGET_FILE):
+        return None
+    with open(BUDGET_FILE) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=7, help='Processos medidos (usa a mediana)')
+    parser.add_argument('--update-budget', action='store_true',
+                        help=f'Grava o orçamento com {BUDGET_MARGIN:.0%} de folga sobre a mediana')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.update({
+            'PYTHONPATH': ROOT,
+            'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'startup.db')}",
+            'AUTO_MIGRATE': 'true',
+        })
+        fresh = measure(env)  # aquece: cria e migra o banco, compila os .pyc
+        results = [measure(env) for _ in range(args.runs)]
+
+    import_ms = statistics.median(r['import_ms'] for r in results)
+    rss_mb = statistics.median(r['rss_mb'] for r in results)
+    loaded = set(results[-1]['modules'])
+
+    print(f"⏱️  import main: mediana {import_ms:.0f} ms "
+          f"(mín {min(r['import_ms'] for r in results):.0f}, máx {max(r['import_ms'] for r in results):.0f})")
+    print(f"💾 RSS máximo:   mediana {rss_mb:.1f} MB")
+
+    budget = load_budget()
+    forbidden = (budget or {}).get('forbidden_modules', DEFAULT_FORBIDDEN)
+
+    if args.update_budget:
+        budget = {
+            'import_ms': round(import_ms * (1 + BUDGET_MARGIN)),
+            'rss_mb': round(rss_mb * (1 + BUDGET_MARGIN), 1),
+            'forbidden_modules': forbidden,
+        }
+        with open(BUDGET_FILE, 'w') as f:
+            json.dump(budget, f, indent=2)
+            f.write('\n')
+        print(f"✅ Orçamento gravado em {os.path.relpath(BUDGET_FILE, ROOT)}: {budget}")
+        return 0
+
+    if budget is None:
+        print(f"⚠️  Sem orçamento ({os.path.relpath(BUDGET_FILE, ROOT)}); use --update-budget")
+        return 0
+
+    failures = []
+    if import_ms > budget['import_ms']:
+        failures.append(f"import main {import_ms:.0f} ms > orçamento {budget['import_ms']} ms")
+    if rss_mb > budget['rss_mb']:
+        failures.append(f"RSS {rss_mb:.1f} MB > orçamento {budget['rss_mb']} MB")
+    for name in forbidden:
+        if name in loaded:
+            failures.append(f"módulo {name} carregado na inicialização")
+        elif name in fresh['modules']:
+            failures.append(f"módulo {name} carregado na inicialização com banco novo (migração)")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print(f"✅ Dentro do orçamento ({budget['import_ms']} ms, {budget['rss_mb']} MB)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
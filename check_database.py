@@ -1,14 +1,22 @@
 #!/usr/bin/env python3
 """
 Verifica a estrutura do banco de dados
+
+Uso:
+    python check_database.py            # colunas e tabelas
+    python check_database.py --explain  # índices usados pelas consultas dos endpoints
 """
 import os
+import sys
 from dotenv import load_dotenv
 
 load_dotenv()
 
 from main import app, db
-from sqlalchemy import text
+from datetime import datetime
+from sqlalchemy import func, select, text, tuple_
+from src.models.user import TrainingPlan, Workout, UserFeedback, UserExam
+from src.services.training_ai import TrainingAIService
 
 def check_database():
     """Verifica se todas as colunas necessárias existem"""
@@ -38,7 +46,7 @@ def check_database():
                         print("\n✅ Coluna pdf_filename existe!")
                     else:
                         print("\n❌ Coluna pdf_filename NÃO existe!")
-                        print("Execute: python migrate_add_pdf_filename.py")
+                        print("Execute: python migrate_db.py")
                 else:
                     # PostgreSQL
                     print("🔍 Verificando estrutura da tabela user_exams...")
@@ -60,7 +68,7 @@ def check_database():
                         print("\n✅ Coluna pdf_filename existe!")
                     else:
                         print("\n❌ Coluna pdf_filename NÃO existe!")
-                        print("Execute: python migrate_add_pdf_filename.py")
+                        print("Execute: python migrate_db.py")
                 
                 # Verificar outras tabelas
                 print("\n📋 Listando todas as tabelas...")
@@ -82,5 +90,83 @@ def check_database():
             import traceback
             traceback.print_exc()
 
+def hot_queries():
+    """Consultas de cada endpoint e o índice (ou índices aceitos) que cada uma deve usar"""
+    return [
+        ('generate_training_plan', 'uq_training_plans_user_semana',
+         select(TrainingPlan).filter_by(user_id=1, semana=1)),
+        ('get_user_training_plans', 'uq_training_plans_user_semana',
+         select(TrainingPlan).filter_by(user_id=1).where(TrainingPlan.semana > 10)
+         .order_by(TrainingPlan.semana).limit(101)),
+        ('TrainingPlan.workouts', 'ix_workouts_training_plan_id',
+         select(Workout).filter_by(training_plan_id=1)),
+        ('rebuild_user_progress (treinos)', 'ix_workouts_user_completed',
+         select(func.count()).select_from(Workout).filter_by(user_id=1)),
+        ('rebuild_user_progress (completos)', 'ix_workouts_user_completed',
+         select(func.count()).select_from(Workout).filter_by(user_id=1, completed=True)),
+        ('rebuild_user_progress (feedback)', 'ix_user_feedback_user_created',
+         select(UserFeedback).filter_by(user_id=1).order_by(UserFeedback.created_at.desc()).limit(5)),
+        ('get_user_feedbacks', 'ix_user_feedback_user_semana',
+         select(UserFeedback).filter_by(user_id=1)
+         .where(tuple_(UserFeedback.semana, UserFeedback.id) > tuple_(3, 1))
+         .order_by(UserFeedback.semana, UserFeedback.id).limit(101)),
+        # Contagem por user_id: qualquer um dos dois índices de user_feedback serve
+        ('get_user_feedbacks (total)', ('ix_user_feedback_user_semana', 'ix_user_feedback_user_created'),
+         select(func.count()).select_from(UserFeedback).filter_by(user_id=1)),
+        ('get_user_exams', 'ix_user_exams_user_data',
+         select(UserExam).filter_by(user_id=1)
+         .where(tuple_(UserExam.data_exame, UserExam.id) < tuple_(datetime(2030, 1, 1), 1))
+         .order_by(UserExam.data_exame.desc(), UserExam.id.desc()).limit(101)),
+        ('analyze_medical_exams', 'ix_user_exams_user_tipo_data',
+         TrainingAIService().latest_exams_query(1)),
+        ('download_exam_pdf', 'ix_user_exams_pdf_filename',
+         select(UserExam).filter_by(pdf_filename='exame.pdf').limit(1)),
+    ]
+
+def explain(conn, stmt):
+    """Retorna o plano de execução da consulta como texto"""
+    compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    if compiled.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+
+    if conn.dialect.name == 'sqlite':
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).fetchall()
+        return '\n'.join(str(row[-1]) for row in rows)
+
+    # Tabelas pequenas sempre usam seq scan no PostgreSQL; desabilitar para
+    # verificar se o índice é utilizável pela consulta
+    conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    rows = conn.exec_driver_sql(f"EXPLAIN {compiled}", params).fetchall()
+    return '\n'.join(row[0] for row in rows)
+
+def check_query_plans():
+    """Verifica com EXPLAIN se cada consulta dos endpoints usa seu índice"""
+    print("🔍 Verificando planos de execução das consultas...")
+    failures = 0
+    with app.app_context():
+        with db.engine.begin() as conn:
+            for endpoint, index_names, stmt in hot_queries():
+                if isinstance(index_names, str):
+                    index_names = (index_names,)
+                plan = explain(conn, stmt)
+                used = next((name for name in index_names if name in plan), None)
+                if used:
+                    print(f"  ✅ {endpoint}: {used}")
+                else:
+                    failures += 1
+                    print(f"  ❌ {endpoint}: esperado {' ou '.join(index_names)}")
+                    for line in plan.splitlines():
+                        print(f"       {line}")
+
+    if failures:
+        print(f"\n❌ {failures} consulta(s) sem o índice esperado")
+    else:
+        print("\n✅ Todas as consultas usam seus índices")
+    return failures == 0
+
 if __name__ == '__main__':
+    if '--explain' in sys.argv:
+        sys.exit(0 if check_query_plans() else 1)
     check_database()
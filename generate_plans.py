@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Geração de planos em lote para grupos de atletas (assessorias, clubes)
+
+Os cálculos do TrainingAIService rodam em um pool de processos como funções
+puras; um único processo escritor grava os resultados em INSERTs em lote.
+
+Uso:
+    python generate_plans.py --users 1,2,3
+    python generate_plans.py --all --nivel iniciante --workers 8
+"""
+import argparse
+import os
+import time
+from multiprocessing import Pool
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.services.training_ai import TrainingAIService, user_plan_data
+
+_service = TrainingAIService()
+
+def build_user_plans(job):
+    """Executado nos workers: calcula as semanas faltantes de um atleta"""
+    user_data, weeks = job
+    plans = _service.build_season_plan(user_data, weeks)
+    for plan in plans:
+        plan['user_id'] = user_data['id']
+    return plans
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Gera planos de treino para vários atletas')
+    parser.add_argument('--users', help='IDs separados por vírgula (ex: 1,2,3)')
+    parser.add_argument('--all', action='store_true', help='Todos os usuários')
+    parser.add_argument('--nivel', help='Filtrar por nível (iniciante, intermediário, avançado)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Processos de cálculo')
+    parser.add_argument('--chunk-size', type=int, default=500, help='Planos por INSERT em lote')
+    args = parser.parse_args()
+    if not args.users and not args.all and not args.nivel:
+        parser.error('informe --users, --all ou --nivel')
+    return args
+
+def load_jobs(args):
+    """Lê os atletas selecionados e as semanas que ainda não têm plano"""
+    from src.models.user import User, TrainingPlan, db
+
+    query = User.query
+    if args.users:
+        query = query.filter(User.id.in_([int(uid) for uid in args.users.split(',')]))
+    if args.nivel:
+        query = query.filter(User.nivel == args.nivel.lower())
+    users = query.all()
+
+    existing = {}
+    for user_id, semana in db.session.query(TrainingPlan.user_id, TrainingPlan.semana) \
+            .filter(TrainingPlan.user_id.in_(query.with_entities(User.id))):
+        existing.setdefault(user_id, set()).add(semana)
+
+    jobs = []
+    for user in users:
+        done = existing.get(user.id, set())
+        weeks = [w for w in range(1, user.semanas_treino + 1) if w not in done]
+        if weeks:
+            jobs.append((user_plan_data(user), weeks))
+    return jobs
+
+def main():
+    args = parse_args()
+
+    from main import app
+    from src.models.user import db
+
+    with app.app_context():
+        jobs = load_jobs(args)
+        if not jobs:
+            print("ℹ️  Nenhum atleta com semanas pendentes")
+            return
+
+        print(f"🏃 Gerando planos para {len(jobs)} atletas com {args.workers} workers...")
+        start = time.perf_counter()
+        total_plans = 0
+        total_workouts = 0
+        buffer = []
+
+        def flush():
+            nonlocal total_plans, total_workouts
+            _service.persist_season_plans(None, buffer)
+            db.session.commit()
+            total_plans += len(buffer)
+            total_workouts += sum(len(plan['workouts']) for plan in buffer)
+            buffer.clear()
+
+        chunksize = max(1, len(jobs) // (args.workers * 4))
+        with Pool(args.workers) as pool:
+            for plans in pool.imap_unordered(build_user_plans, jobs, chunksize=chunksize):
+                buffer.extend(plans)
+                if len(buffer) >= args.chunk_size:
+                    flush()
+        if buffer:
+            flush()
+
+        elapsed = time.perf_counter() - start
+        print(f"✅ {total_plans} planos e {total_workouts} treinos gravados em {elapsed:.2f}s")
+        print(f"📈 Throughput: {total_plans / elapsed:.1f} planos/s")
+
+if __name__ == '__main__':
+    main()
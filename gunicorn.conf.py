@@ -0,0 +1,28 @@
+"""
+Hooks do gunicorn (lido automaticamente quando o gunicorn roda na raiz do projeto).
+
+Cada worker inicia as threads da fila de planos (PLAN_JOB_WORKERS) depois de
+carregar o app. Com METRICS_DIR, mantém o diretório de snapshots das métricas:
+limpo quando o gunicorn inicia e, a cada worker que sai, o snapshot dele vira
+parte de ``retired.json`` (ver src/services/metrics.py).
+"""
+import os
+
+
+def _registry():
+    from src.services.metrics import registry
+    registry.configure(os.getenv('METRICS_DIR'))
+    return registry
+
+
+def on_starting(server):
+    _registry().clear_snapshots()
+
+
+def post_worker_init(worker):
+    from src.app import start_plan_job_pool
+    start_plan_job_pool(worker.wsgi)
+
+
+def child_exit(server, worker):
+    _registry().retire_snapshot(worker.pid)
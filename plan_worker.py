@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Worker da fila de geração de planos (jobs criados com ?async=1)
+
+Roda as mesmas threads que os workers do gunicorn iniciam com PLAN_JOB_WORKERS,
+mas em um processo separado - útil com PLAN_JOB_WORKERS=0 no gunicorn.
+
+Uso:
+    python plan_worker.py --workers 4
+    python plan_worker.py --drain      # processa a fila atual e sai
+"""
+import argparse
+import os
+import signal
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Executa os jobs de geração de planos')
+    parser.add_argument('--workers', type=int, default=2, help='Threads de trabalho')
+    parser.add_argument('--poll-interval', type=float, default=2.0, help='Segundos entre consultas com a fila vazia')
+    parser.add_argument('--drain', action='store_true', help='Processar os jobs pendentes e sair')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    from main import app
+    from src.services.training_ai import TrainingAIService
+    from src.services.plan_jobs import PlanJobWorkerPool
+
+    pool = PlanJobWorkerPool(app, TrainingAIService(), size=args.workers, poll_interval=args.poll_interval)
+
+    if args.drain:
+        processed = pool.drain()
+        print(f"✅ {processed} job(s) processado(s)")
+        return
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    pool.start()
+    print(f"🏃 {args.workers} worker(s) aguardando jobs (Ctrl+C para sair)...")
+    stop.wait()
+
+    print("⏹️  Finalizando workers...")
+    pool.stop()
+
+if __name__ == '__main__':
+    main()
@@ -27,7 +27,7 @@ cd ..
 
 # Executar migrações do banco de dados
 echo "🗄️  Executando migrações do banco de dados..."
-python migrate_add_pdf_filename.py
+python migrate_db.py
 
 echo "✅ Build concluído!"
 echo "   Arquivos estáticos em: ./static/"
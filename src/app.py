@@ -0,0 +1,208 @@
+"""
+Fábrica da aplicação Flask.
+
+``create_app`` monta um app novo a cada chamada (configuração, extensões,
+blueprints, comandos de CLI e pool de jobs); ``main.py`` cria o app usado pelo
+gunicorn (``main:app``) e pelos scripts. Dependências pesadas (NumPy, pandas)
+não são importadas aqui nem pelos módulos das rotas: entram só nos caminhos que
+as usam (geração de planos, carga de treino, importação de atividades), então
+o cold start de cada worker fica barato. Medido em
+``benchmarks/bench_startup.py``.
+"""
+import os
+
+import click
+from flask import Blueprint, Flask, current_app, send_from_directory
+from flask.cli import with_appcontext
+from flask_cors import CORS
+
+from src.models.user import db
+from src.models.engine import configure_engine, engine_options
+from src.models.migrations import run_migrations
+from src.routes.training import training_bp, ai_service
+from src.routes.http_cache import init_response_cache
+from src.routes.instrumentation import init_instrumentation, instrument_pool
+from src.routes.json_provider import init_json_provider
+from src.routes.replica import init_read_replicas
+from src.services.plan_jobs import PlanJobWorkerPool
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _default_config():
+    """Configuração lida do ambiente (.env já carregado por quem chama)"""
+    # Garantir que o diretório do banco de dados existe
+    # Usar caminho absoluto para evitar problemas
+    db_dir = os.path.join(BASE_DIR, 'database')
+    os.makedirs(db_dir, exist_ok=True)
+
+    # URL do banco de dados (SQLite precisa de 4 barras: sqlite:/// + caminho absoluto)
+    db_path = os.path.join(db_dir, 'app.db')
+    return {
+        'SECRET_KEY': os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production'),
+        'SQLALCHEMY_DATABASE_URI': os.getenv('DATABASE_URL', f"sqlite:///{db_path}"),
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        # SQLite em produção (vários workers): PRAGMAs aplicados em cada conexão nova
+        # (src/models/engine.py). WAL deixa leituras e a escrita simultâneas e o
+        # busy_timeout faz a escrita esperar o lock em vez de falhar
+        'SQLITE_JOURNAL_MODE': os.getenv('SQLITE_JOURNAL_MODE', 'wal'),
+        'SQLITE_SYNCHRONOUS': os.getenv('SQLITE_SYNCHRONOUS', 'normal'),
+        'SQLITE_BUSY_TIMEOUT_MS': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+        'SQLITE_MMAP_SIZE_MB': int(os.getenv('SQLITE_MMAP_SIZE_MB', '256')),
+        'SQLITE_CACHE_SIZE_MB': int(os.getenv('SQLITE_CACHE_SIZE_MB', '16')),  # por conexão
+        # Pool de conexões do PostgreSQL, por processo: até DB_POOL_SIZE + DB_MAX_OVERFLOW
+        # conexões; pre-ping descarta conexões derrubadas pelo servidor e recycle
+        # (segundos) as renova antes do timeout de ociosidade de proxies/poolers
+        'DB_POOL_SIZE': int(os.getenv('DB_POOL_SIZE', '5')),
+        'DB_MAX_OVERFLOW': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+        'DB_POOL_TIMEOUT': int(os.getenv('DB_POOL_TIMEOUT', '30')),
+        'DB_POOL_RECYCLE': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+        'DB_POOL_PRE_PING': os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true',
+        # Réplicas de leitura (URLs separadas por vírgula): os GETs por usuário leem
+        # delas, exceto nos REPLICA_STICKY_SECONDS seguintes a uma escrita do usuário
+        # (src/routes/replica.py). Vazio = tudo no primário
+        'DATABASE_REPLICA_URLS': [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()],
+        'REPLICA_STICKY_SECONDS': int(os.getenv('REPLICA_STICKY_SECONDS', '10')),
+        # Entrega dos PDFs de exames: vazio = pelo próprio Flask; 'x-accel' (nginx) ou
+        # 'x-sendfile' (Apache/lighttpd) delegam a transferência ao proxy da frente
+        'EXAM_PDF_OFFLOAD': os.getenv('EXAM_PDF_OFFLOAD', '').lower(),
+        'EXAM_PDF_ACCEL_PREFIX': os.getenv('EXAM_PDF_ACCEL_PREFIX', '/protected/exams/'),
+        # Encoder JSON das respostas: auto (orjson se instalado), orjson ou stdlib
+        'JSON_ENCODER': os.getenv('JSON_ENCODER', 'auto').lower(),
+        # Cache em memória das respostas GET por (rota, usuário, versão dos dados);
+        # 0 = desligado, só ETag/304
+        'RESPONSE_CACHE_SIZE': int(os.getenv('RESPONSE_CACHE_SIZE', '0')),
+        'FRONTEND_URL': os.getenv('FRONTEND_URL', 'http://localhost:5173'),
+        # As migrações de schema rodam uma vez por processo na inicialização; o caminho
+        # das requisições não faz nenhum trabalho de schema. Use AUTO_MIGRATE=false para
+        # aplicá-las apenas via `python migrate_db.py`.
+        'AUTO_MIGRATE': os.getenv('AUTO_MIGRATE', 'true').lower() == 'true',
+        # Threads que drenam a fila de geração de planos (?async=1) nos processos
+        # servidores: iniciadas só pelo gunicorn.conf.py e pelo `python main.py`
+        # (``start_plan_job_pool``); scripts e test clients nunca as iniciam.
+        # 0 desliga (ex: quando `python plan_worker.py` roda à parte).
+        'PLAN_JOB_WORKERS': int(os.getenv('PLAN_JOB_WORKERS', '2')),
+        # Métricas por rota em /metrics; com vários workers do gunicorn, METRICS_DIR
+        # é o diretório onde cada processo grava as suas (limpo pelo gunicorn.conf.py)
+        'METRICS_ENABLED': os.getenv('METRICS_ENABLED', 'true').lower() == 'true',
+        'METRICS_DIR': os.getenv('METRICS_DIR', ''),
+    }
+
+
+def create_app(config=None):
+    """Cria o app; ``config`` sobrescreve os valores lidos do ambiente"""
+    app = Flask(__name__, static_folder=os.path.join(BASE_DIR, 'static'))
+    app.config.update(_default_config())
+    app.config.update(config or {})
+    # Opções explícitas em SQLALCHEMY_ENGINE_OPTIONS têm precedência
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **engine_options(app.config['SQLALCHEMY_DATABASE_URI'], app.config),
+        **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}),
+    }
+
+    # Primeiro, para que a medição inclua os demais hooks de requisição
+    init_instrumentation(app)
+    init_json_provider(app)
+    init_response_cache(app)
+    init_read_replicas(app)
+
+    # Habilitar CORS para permitir requisições do frontend
+    CORS(app, origins=[app.config['FRONTEND_URL']])
+
+    # Registrar blueprints
+    app.register_blueprint(training_bp, url_prefix='/api')
+    app.register_blueprint(_core_bp)
+
+    # Inicializar banco de dados
+    db.init_app(app)
+    with app.app_context():
+        for bind, engine in db.engines.items():
+            configure_engine(engine, app.config, read_only=bind is not None and bind.startswith('replica-'))
+            instrument_pool(app, engine, bind or 'primary')
+
+    for command in (migrate_command, rebuild_progress_command, rebuild_load_command):
+        app.cli.add_command(command)
+
+    if app.config['AUTO_MIGRATE']:
+        try:
+            init_database(app)
+        except Exception as e:
+            print(f"⚠️  Aviso: Erro ao aplicar migrações: {e}")
+
+    # Criado parado: só os pontos de entrada do servidor chamam start_plan_job_pool
+    app.extensions['plan_job_pool'] = PlanJobWorkerPool(app, ai_service, size=app.config['PLAN_JOB_WORKERS'])
+
+    return app
+
+
+def start_plan_job_pool(app):
+    """Inicia as threads da fila de planos deste processo (PLAN_JOB_WORKERS)"""
+    app.extensions['plan_job_pool'].start()
+
+
+def init_database(app):
+    """Aplica as migrações pendentes uma única vez, na inicialização do processo.
+
+    Só schema: o preenchimento das tabelas derivadas fica com migrate_db.py e o CLI.
+    """
+    with app.app_context():
+        run_migrations(db.engine, backfill=False)
+
+
+# Rotas fora da API: frontend estático e health check
+_core_bp = Blueprint('core', __name__)
+
+
+@_core_bp.route('/', defaults={'path': ''})
+@_core_bp.route('/<path:path>')
+def serve(path):
+    """Serve frontend static files"""
+    static_folder_path = current_app.static_folder
+    if static_folder_path is None:
+        return "Static folder not configured", 404
+
+    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
+        return send_from_directory(static_folder_path, path)
+    else:
+        index_path = os.path.join(static_folder_path, 'index.html')
+        if os.path.exists(index_path):
+            return send_from_directory(static_folder_path, 'index.html')
+        else:
+            return "index.html not found", 404
+
+
+@_core_bp.route('/health')
+def health_check():
+    """Health check endpoint for monitoring"""
+    return {'status': 'healthy', 'service': 'FitIA API'}, 200
+
+
+@click.command('migrate')
+@with_appcontext
+def migrate_command():
+    """Aplica as migrações pendentes (flask --app main migrate)"""
+    run_migrations(db.engine)
+
+
+@click.command('rebuild-progress')
+@click.option('--user-id', type=int, default=None, help='Recalcular apenas este usuário')
+@with_appcontext
+def rebuild_progress_command(user_id):
+    """Recalcula a tabela user_progress do zero (flask --app main rebuild-progress)"""
+    from src.services.progress import rebuild_user_progress
+
+    total = rebuild_user_progress(user_id=user_id)
+    db.session.commit()
+    print(f"✅ {total} resumo(s) de progresso recalculado(s)")
+
+
+@click.command('rebuild-load')
+@click.option('--user-id', type=int, default=None, help='Recalcular apenas este usuário')
+@with_appcontext
+def rebuild_load_command(user_id):
+    """Recalcula a tabela training_load do zero (flask --app main rebuild-load)"""
+    from src.services.training_load import rebuild_training_load
+
+    total = rebuild_training_load(user_id=user_id)
+    db.session.commit()
+    print(f"✅ {total} dia(s) de carga de treino recalculado(s)")
@@ -1,3 +1,3 @@
-from .user import db, User, TrainingPlan, Workout, UserFeedback, UserExam
+from .user import db, User, TrainingPlan, Workout, UserFeedback, UserExam, UserProgress, TrainingLoad, PlanJob
 
-__all__ = ['db', 'User', 'TrainingPlan', 'Workout', 'UserFeedback', 'UserExam']
+__all__ = ['db', 'User', 'TrainingPlan', 'Workout', 'UserFeedback', 'UserExam', 'UserProgress', 'TrainingLoad', 'PlanJob']
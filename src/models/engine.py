@@ -0,0 +1,61 @@
+"""
+Configuração dos engines do banco: modo de produção do SQLite e pool dos bancos servidor.
+
+SQLite com vários workers do gunicorn: cada conexão nova recebe os PRAGMAs de
+``sqlite_pragmas`` - WAL (leitores não bloqueiam o escritor e vice-versa),
+synchronous=NORMAL (seguro com WAL; o fsync fica para os checkpoints),
+busy_timeout (espera o lock em vez de falhar com "database is locked"), mmap e
+cache por conexão. PostgreSQL recebe tamanho do pool, pre-ping e recycle
+explícitos. As estatísticas do pool vão para o /metrics
+(``instrument_pool`` em src/routes/instrumentation.py).
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def engine_options(url, config):
+    """Opções de create_engine para ``url`` (SQLALCHEMY_ENGINE_OPTIONS)"""
+    if make_url(url).get_backend_name() == 'sqlite':
+        # Timeout do driver ao pegar o lock, igual ao busy_timeout dos PRAGMAs
+        return {'connect_args': {'timeout': config['SQLITE_BUSY_TIMEOUT_MS'] / 1000}}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+
+
+def sqlite_pragmas(config, in_memory=False):
+    """PRAGMAs aplicados a cada conexão SQLite nova"""
+    pragmas = [
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA cache_size={-int(config['SQLITE_CACHE_SIZE_MB']) * 1024}",  # negativo = KiB
+    ]
+    if not in_memory:
+        # journal_mode fica gravado no arquivo; mmap não se aplica a bancos em memória
+        pragmas.insert(0, f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}")
+        pragmas.append(f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE_MB']) * 1024 * 1024}")
+    return pragmas
+
+
+def configure_engine(engine, config, read_only=False):
+    """Liga os PRAGMAs de produção em um engine SQLite (outros bancos: nada a fazer).
+
+    ``read_only`` (réplicas) recusa escritas na própria conexão.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+    in_memory = engine.url.database in (None, '', ':memory:')
+    pragmas = sqlite_pragmas(config, in_memory)
+    if read_only:
+        pragmas.append('PRAGMA query_only=ON')
+
+    @event.listens_for(engine, 'connect')
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
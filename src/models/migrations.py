@@ -0,0 +1,233 @@
+"""
+Migrações versionadas do banco de dados.
+
+Cada passo é registrado na tabela ``schema_version`` depois de aplicado, então
+o runner só executa o que ainda falta. Deve ser chamado uma vez na inicialização
+do processo (ou via ``python migrate_db.py`` / ``flask migrate``), nunca no
+caminho de uma requisição.
+
+Alguns passos criam tabelas derivadas que precisam ser preenchidas a partir dos
+dados existentes (``BACKFILLS``). Na inicialização do app as migrações são só de
+schema (``backfill=False``), para que um worker não carregue pandas nem recalcule
+tudo ao subir; ``migrate_db.py`` e ``flask migrate`` também preenchem. Em um banco
+que já tinha usuários, o preenchimento pulado é avisado com o comando do CLI;
+até ele rodar, cada usuário é recalculado quando é lido ou escrito
+(``get_user_progress`` e ``training_load.ensure_history``).
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateIndex
+
+from src.models.user import db, User, TrainingPlan, Workout, UserFeedback, UserExam, UserProgress, TrainingLoad, PlanJob
+
+schema_metadata = MetaData()
+
+schema_version = Table(
+    'schema_version', schema_metadata,
+    Column('version', Integer, primary_key=True),
+    Column('name', String(100), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+
+def _column_names(conn, table_name):
+    return {col['name'] for col in inspect(conn).get_columns(table_name)}
+
+
+def _add_column_if_missing(conn, table_name, column_name, ddl_type):
+    """ALTER TABLE idempotente (o banco pode ter sido criado já com a coluna)"""
+    if column_name not in _column_names(conn, table_name):
+        conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {column_name} {ddl_type}'))
+
+
+def _create_indexes(conn, model, *names):
+    """Cria os índices declarados no modelo (pelo nome) que ainda não existem"""
+    for index in model.__table__.indexes:
+        if index.name in names:
+            index.create(bind=conn, checkfirst=True)
+
+
+def _create_tables(conn):
+    """Cria as tabelas dos modelos que ainda não existem"""
+    db.metadata.create_all(bind=conn)
+
+
+def _add_pdf_filename(conn):
+    """Substitui o antigo migrate_add_pdf_filename.py"""
+    _add_column_if_missing(conn, 'user_exams', 'pdf_filename', 'VARCHAR(255)')
+
+
+def _add_teste_3km(conn):
+    """Colunas teste_3km (primeira versão do migrate_db.py)"""
+    _add_column_if_missing(conn, 'users', 'teste_3km_tempo', 'FLOAT')
+    _add_column_if_missing(conn, 'users', 'teste_3km_fc_media', 'FLOAT')
+    _add_column_if_missing(conn, 'users', 'teste_3km_rpe', 'INTEGER')
+
+
+def _add_query_indexes(conn):
+    """Índices compostos das consultas por usuário e semana única por plano"""
+    duplicates = conn.execute(text("""
+        SELECT user_id, semana FROM training_plans
+        GROUP BY user_id, semana HAVING COUNT(*) > 1
+    """)).fetchall()
+    if duplicates:
+        semanas = ', '.join(f'usuário {user_id} semana {semana}' for user_id, semana in duplicates[:10])
+        raise RuntimeError(
+            f"Planos duplicados impedem o índice único (user_id, semana): {semanas}. "
+            "Remova as duplicatas e execute a migração novamente."
+        )
+
+    _create_indexes(conn, TrainingPlan, 'uq_training_plans_user_semana')
+    _create_indexes(conn, Workout, 'ix_workouts_user_completed', 'ix_workouts_training_plan_id')
+    _create_indexes(conn, UserFeedback, 'ix_user_feedback_user_created', 'ix_user_feedback_user_semana')
+    _create_indexes(conn, UserExam, 'ix_user_exams_user_tipo_data', 'ix_user_exams_user_data',
+                    'ix_user_exams_pdf_filename')
+
+
+def _add_user_progress(conn):
+    """Tabela de resumo user_progress (preenchida por _backfill_user_progress)"""
+    UserProgress.__table__.create(bind=conn, checkfirst=True)
+
+
+def _backfill_user_progress(conn):
+    from src.services.progress import rebuild_user_progress
+    rebuild_user_progress(bind=conn)
+
+
+def _add_pdf_sha256(conn):
+    """Hash do PDF armazenado (uploads endereçados por conteúdo)"""
+    _add_column_if_missing(conn, 'user_exams', 'pdf_sha256', 'VARCHAR(64)')
+
+
+def _add_training_load(conn):
+    """Tabela de carga de treino diária (preenchida por _backfill_training_load)"""
+    TrainingLoad.__table__.create(bind=conn, checkfirst=True)
+
+
+def _backfill_training_load(conn):
+    from src.services.training_load import rebuild_training_load  # importa pandas
+    rebuild_training_load(bind=conn)
+
+
+def _add_plan_jobs(conn):
+    """Fila de geração de planos (jobs assíncronos)"""
+    PlanJob.__table__.create(bind=conn, checkfirst=True)
+
+
+def _add_plan_jobs_active_index(conn):
+    """Índice único parcial: um job ativo por usuário e alvo (enqueue concorrente)"""
+    active = conn.execute(text("""
+        SELECT id, user_id, semana, status FROM plan_jobs
+        WHERE status IN ('queued', 'running') ORDER BY id
+    """)).fetchall()
+    keep = {}
+    for job in active:
+        target = (job.user_id, _job_target(job.semana))
+        if target not in keep or (job.status == 'running' and keep[target].status != 'running'):
+            keep[target] = job
+    duplicates = [job.id for job in active if keep[(job.user_id, _job_target(job.semana))].id != job.id]
+    if duplicates:
+        # Jobs repetidos enfileirados antes do índice: o resultado viria do mantido
+        conn.execute(
+            PlanJob.__table__.update()
+            .where(PlanJob.id.in_(duplicates))
+            .values(status='failed', error='Job duplicado', locked_at=None, finished_at=datetime.utcnow())
+        )
+    # Índice de expressão: a reflexão do checkfirst não o enxerga, então IF NOT EXISTS
+    conn.execute(CreateIndex(_active_jobs_index(), if_not_exists=True))
+
+
+def _job_target(semana):
+    return semana if semana is not None else -1  # mesma chave do índice (temporada = -1)
+
+
+def _active_jobs_index():
+    return next(i for i in PlanJob.__table__.indexes if i.name == 'uq_plan_jobs_user_target_active')
+
+
+def _fix_plan_jobs_active_index(conn):
+    """Recria o índice da versão 10, que usava 0 para a temporada (colidia com a semana 0)"""
+    conn.execute(text('DROP INDEX IF EXISTS uq_plan_jobs_user_target_active'))
+    conn.execute(CreateIndex(_active_jobs_index()))
+
+
+def _add_data_version(conn):
+    """Versão dos dados do usuário, usada nas ETags das leituras"""
+    _add_column_if_missing(conn, 'users', 'data_version', 'INTEGER NOT NULL DEFAULT 1')
+
+
+# Lista ordenada de migrações: (versão, nome, função). Nunca reordenar nem
+# renumerar passos já publicados - apenas acrescentar no final.
+MIGRATIONS = [
+    (1, 'create_tables', _create_tables),
+    (2, 'user_exams_pdf_filename', _add_pdf_filename),
+    (3, 'users_teste_3km', _add_teste_3km),
+    (4, 'query_indexes', _add_query_indexes),
+    (5, 'user_progress', _add_user_progress),
+    (6, 'user_exams_pdf_sha256', _add_pdf_sha256),
+    (7, 'training_load', _add_training_load),
+    (8, 'plan_jobs', _add_plan_jobs),
+    (9, 'users_data_version', _add_data_version),
+    (10, 'plan_jobs_active_unique', _add_plan_jobs_active_index),
+    (11, 'plan_jobs_active_unique_season_key', _fix_plan_jobs_active_index),
+]
+
+# Passos que preenchem tabelas derivadas com os dados existentes:
+# versão -> (função, comando do CLI que refaz o preenchimento)
+BACKFILLS = {
+    5: (_backfill_user_progress, 'rebuild-progress'),
+    7: (_backfill_training_load, 'rebuild-load'),
+}
+
+
+def current_version(engine):
+    """Retorna a última versão aplicada (0 se o banco nunca foi migrado)"""
+    with engine.connect() as conn:
+        if not inspect(conn).has_table('schema_version'):
+            return 0
+        versions = conn.execute(select(schema_version.c.version)).scalars().all()
+        return max(versions, default=0)
+
+
+def run_migrations(engine, verbose=True, backfill=True):
+    """Aplica, em ordem, as migrações pendentes. Retorna as versões aplicadas.
+
+    ``backfill=False`` (inicialização do app) pula o preenchimento de BACKFILLS.
+    """
+    schema_metadata.create_all(bind=engine)
+
+    applied = []
+    skipped = []
+    for version, name, step in MIGRATIONS:
+        try:
+            with engine.begin() as conn:
+                already = conn.execute(
+                    select(schema_version.c.version).where(schema_version.c.version == version)
+                ).first()
+                if already:
+                    continue
+
+                if verbose:
+                    print(f"📊 Aplicando migração {version:04d}_{name}...")
+                step(conn)
+                if version in BACKFILLS:
+                    fill, command = BACKFILLS[version]
+                    if backfill:
+                        fill(conn)
+                    elif conn.execute(select(User.id).limit(1)).first() is not None:
+                        skipped.append(command)
+                conn.execute(schema_version.insert().values(
+                    version=version, name=name, applied_at=datetime.utcnow()
+                ))
+        except IntegrityError:
+            # Outro worker aplicou o mesmo passo em paralelo
+            continue
+        applied.append(version)
+
+    if verbose and applied:
+        print(f"✅ Banco de dados na versão {applied[-1]}")
+    for command in skipped:
+        print(f"⚠️  Tabela derivada criada vazia: execute `flask --app main {command}`")
+    return applied
@@ -0,0 +1,46 @@
+"""
+Sessão que envia leituras para uma réplica do banco.
+
+Cada URL de DATABASE_REPLICA_URLS vira um bind do Flask-SQLAlchemy
+(``replica-1``, ``replica-2``, ...). Dentro de ``use_replica`` os SELECTs da
+sessão vão para a réplica escolhida; escritas (flush, INSERT/UPDATE/DELETE,
+SQL textual) continuam no primário e, a partir da primeira, o resto da sessão
+também lê do primário. Fora de ``use_replica`` nada muda. Quais rotas usam
+réplica e a janela de read-your-writes ficam em src/routes/replica.py.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask_sqlalchemy.session import Session
+
+# Bind da réplica escolhida para o contexto atual (None = primário)
+_replica = ContextVar('read_replica', default=None)
+
+
+def replica_bind_keys(urls):
+    return [f'replica-{i}' for i in range(1, len(urls) + 1)]
+
+
+@contextmanager
+def use_replica(bind_key):
+    """Leituras da sessão no bind ``bind_key`` enquanto o bloco executa"""
+    token = _replica.set(bind_key)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+class RoutingSession(Session):
+    def use_primary(self):
+        """Próximas leituras no primário (antes de ler dados que serão reescritos)"""
+        self.info['wrote'] = True
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = _replica.get()
+        if replica is not None and bind is None:
+            if self._flushing or not getattr(clause, 'is_select', False):
+                self.info['wrote'] = True
+            elif not self.info.get('wrote'):
+                return self._db.engines[replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
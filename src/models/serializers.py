@@ -0,0 +1,113 @@
+"""
+Serialização em lote dos modelos para as respostas da API.
+
+As funções daqui carregam os treinos de todos os planos numa consulta só, para
+que serializar N planos custe um número fixo de consultas e não N+1.
+
+Os ``RowSerializer`` trabalham direto sobre tuplas de colunas, sem instanciar
+os modelos, e permitem escolher os campos (``?fields=``). Datetimes saem como
+estão; o encoder JSON do app (src/routes/json_provider.py) os converte para
+ISO 8601, igual ao ``to_dict``.
+"""
+from sqlalchemy import select
+
+from src.models.user import db, TrainingPlan, Workout, format_pace
+
+
+class FieldSelectionError(ValueError):
+    pass
+
+
+class RowSerializer:
+    """Monta dicts a partir de tuplas com as colunas de ``model``.
+
+    ``derived`` mapeia campos calculados para (colunas de origem, função).
+    """
+
+    def __init__(self, model, derived=None):
+        self.columns = {column.key: column for column in model.__table__.columns}
+        self.derived = derived or {}
+        self.all_fields = list(self.columns) + [f for f in self.derived if f not in self.columns]
+
+    def select_fields(self, raw):
+        """Campos pedidos em ``raw`` ("id,tipo,...") ou todos se vazio"""
+        if not raw:
+            return self.all_fields
+        fields = list(dict.fromkeys(f.strip() for f in raw.split(',') if f.strip()))
+        unknown = [f for f in fields if f not in self.all_fields]
+        if unknown or not fields:
+            raise FieldSelectionError(
+                f"Campos inválidos: {', '.join(unknown) or raw}. Disponíveis: {', '.join(self.all_fields)}"
+            )
+        return fields
+
+    def source(self, fields, extra=()):
+        """Nomes e colunas a selecionar para produzir ``fields`` (mais ``extra``)"""
+        names = []
+        for field in fields:
+            names.extend(self.derived[field][0] if field in self.derived else (field,))
+        names = list(dict.fromkeys(names + list(extra)))
+        return names, [self.columns[name] for name in names]
+
+    def row_builder(self, names, fields):
+        """Função tupla -> dict para linhas selecionadas com ``names``"""
+        index = {name: i for i, name in enumerate(names)}
+        plain = [(field, index[field]) for field in fields if field not in self.derived]
+        computed = [
+            (field, func, [index[name] for name in sources])
+            for field, (sources, func) in self.derived.items() if field in fields
+        ]
+
+        def build(row):
+            item = {field: row[i] for field, i in plain}
+            for field, func, positions in computed:
+                item[field] = func(*(row[i] for i in positions))
+            return item
+        return build
+
+
+def _format_pace_or_none(pace):
+    return format_pace(pace) if pace is not None else None
+
+
+PLAN_ROWS = RowSerializer(TrainingPlan)
+WORKOUT_ROWS = RowSerializer(Workout, derived={
+    'ritmo_formatado': (('ritmo_alvo',), _format_pace_or_none),
+})
+
+
+def training_plans_query(user_id, semana_inicio=None, semana_fim=None):
+    """Planos do usuário (opcionalmente num intervalo de semanas) como tuplas com as colunas do plano.
+
+    Os treinos não vêm junto: ``serialize_plan_rows`` os carrega numa consulta só.
+    """
+    query = db.session.query(*PLAN_ROWS.columns.values()).filter(TrainingPlan.user_id == user_id)
+    if semana_inicio is not None:
+        query = query.filter(TrainingPlan.semana >= semana_inicio)
+    if semana_fim is not None:
+        query = query.filter(TrainingPlan.semana <= semana_fim)
+    return query.order_by(TrainingPlan.semana)
+
+
+def serialize_plan_rows(plan_rows, workout_fields=None):
+    """Planos (tuplas de ``training_plans_query``) com os treinos em uma consulta.
+
+    ``workout_fields`` limita os campos de cada treino (padrão: todos).
+    """
+    workout_fields = workout_fields or WORKOUT_ROWS.all_fields
+    plan_ids = [row.id for row in plan_rows]
+
+    workouts = {plan_id: [] for plan_id in plan_ids}
+    if plan_ids:
+        names, columns = WORKOUT_ROWS.source(workout_fields, extra=('training_plan_id',))
+        build = WORKOUT_ROWS.row_builder(names, workout_fields)
+        plan_position = names.index('training_plan_id')
+        for row in db.session.execute(
+            select(*columns)
+            .where(Workout.training_plan_id.in_(plan_ids))
+            .order_by(Workout.training_plan_id, Workout.dia, Workout.id)
+        ):
+            workouts[row[plan_position]].append(build(row))
+
+    build_plan = PLAN_ROWS.row_builder(list(PLAN_ROWS.columns), PLAN_ROWS.all_fields)
+    return [dict(build_plan(row), workouts=workouts[row.id]) for row in plan_rows]
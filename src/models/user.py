@@ -2,7 +2,15 @@ from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 import json
 
-db = SQLAlchemy()
+from src.models.replicas import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+def format_pace(pace_min_km):
+    """Formata o ritmo no formato mm:ss"""
+    minutes = int(pace_min_km)
+    seconds = int((pace_min_km - minutes) * 60)
+    return f"{minutes}:{seconds:02d}"
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -20,6 +28,7 @@ class User(db.Model):
     teste_5km_fc_media = db.Column(db.Float, nullable=False)
     teste_5km_rpe = db.Column(db.Integer, nullable=False)
     performance_factor = db.Column(db.Float, default=1.0)
+    data_version = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # ETag das leituras (src/services/data_version.py)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relacionamentos
@@ -46,6 +55,10 @@ class User(db.Model):
 
 class TrainingPlan(db.Model):
     __tablename__ = 'training_plans'
+    __table_args__ = (
+        # Uma semana por usuário; também atende filter_by(user_id, semana) e order_by(semana)
+        db.Index('uq_training_plans_user_semana', 'user_id', 'semana', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -56,7 +69,7 @@ class TrainingPlan(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relacionamentos
-    workouts = db.relationship('Workout', backref='training_plan', lazy=True)
+    workouts = db.relationship('Workout', backref='training_plan', lazy=True, order_by='Workout.dia')
     
     def to_dict(self):
         return {
@@ -72,6 +85,10 @@ class TrainingPlan(db.Model):
 
 class Workout(db.Model):
     __tablename__ = 'workouts'
+    __table_args__ = (
+        db.Index('ix_workouts_user_completed', 'user_id', 'completed'),
+        db.Index('ix_workouts_training_plan_id', 'training_plan_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -108,13 +125,14 @@ class Workout(db.Model):
         }
     
     def format_pace(self, pace_min_km):
-        """Formata o ritmo no formato mm:ss"""
-        minutes = int(pace_min_km)
-        seconds = int((pace_min_km - minutes) * 60)
-        return f"{minutes}:{seconds:02d}"
+        return format_pace(pace_min_km)
 
 class UserFeedback(db.Model):
     __tablename__ = 'user_feedback'
+    __table_args__ = (
+        db.Index('ix_user_feedback_user_created', 'user_id', 'created_at'),
+        db.Index('ix_user_feedback_user_semana', 'user_id', 'semana'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -140,12 +158,18 @@ class UserFeedback(db.Model):
 # Modelo para futuras funcionalidades de exames
 class UserExam(db.Model):
     __tablename__ = 'user_exams'
+    __table_args__ = (
+        db.Index('ix_user_exams_user_tipo_data', 'user_id', 'tipo_exame', 'data_exame'),
+        db.Index('ix_user_exams_user_data', 'user_id', 'data_exame'),
+        db.Index('ix_user_exams_pdf_filename', 'pdf_filename'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     tipo_exame = db.Column(db.String(50), nullable=False)  # 'bioimpedancia', 'espirometria', 'vo2max'
     dados_exame = db.Column(db.Text, nullable=True)  # JSON com os dados do exame (opcional se tiver PDF)
     pdf_filename = db.Column(db.String(255), nullable=True)  # Nome do arquivo PDF armazenado
+    pdf_sha256 = db.Column(db.String(64), nullable=True)  # Hash do conteúdo do PDF (nome do arquivo armazenado)
     data_exame = db.Column(db.DateTime, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -160,3 +184,94 @@ class UserExam(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+class UserProgress(db.Model):
+    """Resumo de progresso por usuário, mantido junto com cada escrita
+    (ver src/services/progress.py) para que a consulta seja uma leitura por PK"""
+    __tablename__ = 'user_progress'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    total_plans = db.Column(db.Integer, nullable=False, default=0)
+    total_workouts = db.Column(db.Integer, nullable=False, default=0)
+    completed_workouts = db.Column(db.Integer, nullable=False, default=0)
+    completed_km = db.Column(db.Float, nullable=False, default=0.0)
+    last_activity_at = db.Column(db.DateTime, nullable=True)
+    recent_feedback = db.Column(db.Text, nullable=True)  # JSON com os 5 feedbacks mais recentes
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'total_plans': self.total_plans,
+            'total_workouts': self.total_workouts,
+            'completed_workouts': self.completed_workouts,
+            'completed_km': round(self.completed_km or 0.0, 1),
+            'last_activity_at': self.last_activity_at.isoformat() if self.last_activity_at else None,
+            'recent_feedback': json.loads(self.recent_feedback) if self.recent_feedback else []
+        }
+
+class TrainingLoad(db.Model):
+    """Carga diária do usuário e médias exponenciais (ver src/services/training_load.py).
+    Só dias com treino completo têm linha; entre elas os valores apenas decaem."""
+    __tablename__ = 'training_load'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    data = db.Column(db.Date, primary_key=True)
+    srpe = db.Column(db.Float, nullable=False, default=0.0)  # RPE x duração (min)
+    trimp = db.Column(db.Float, nullable=False, default=0.0)  # TRIMP de Banister (FC)
+    atl_srpe = db.Column(db.Float, nullable=False, default=0.0)  # carga aguda (7 dias)
+    ctl_srpe = db.Column(db.Float, nullable=False, default=0.0)  # carga crônica (42 dias)
+    atl_trimp = db.Column(db.Float, nullable=False, default=0.0)
+    ctl_trimp = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class PlanJob(db.Model):
+    """Fila de geração de planos no próprio banco (ver src/services/plan_jobs.py)"""
+    __tablename__ = 'plan_jobs'
+    __table_args__ = (
+        # Próximo job da fila: WHERE status = 'queued' ORDER BY id
+        db.Index('ix_plan_jobs_status_id', 'status', 'id'),
+        db.Index('ix_plan_jobs_user_status', 'user_id', 'status'),
+        # No máximo um job ativo por usuário e alvo (semana; temporada = NULL -> -1,
+        # que não é uma semana válida)
+        db.Index(
+            'uq_plan_jobs_user_target_active', 'user_id', db.text('COALESCE(semana, -1)'), unique=True,
+            sqlite_where=db.text("status IN ('queued', 'running')"),
+            postgresql_where=db.text("status IN ('queued', 'running')")
+        ),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    tipo = db.Column(db.String(20), nullable=False)  # 'semana' ou 'temporada'
+    semana = db.Column(db.Integer, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    weeks_total = db.Column(db.Integer, nullable=True)
+    weeks_done = db.Column(db.Integer, nullable=False, default=0)
+    result = db.Column(db.Text, nullable=True)  # JSON com o resultado
+    error = db.Column(db.Text, nullable=True)
+    worker = db.Column(db.String(100), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)  # renovado durante a execução
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'tipo': self.tipo,
+            'semana': self.semana,
+            'status': self.status,
+            'attempts': self.attempts,
+            'progress': {
+                'weeks_done': self.weeks_done,
+                'weeks_total': self.weeks_total,
+                'percentage': round(self.weeks_done / self.weeks_total * 100, 1) if self.weeks_total else None
+            },
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -0,0 +1,71 @@
+"""
+ETag e cache de respostas para as leituras por usuário.
+
+A ETag vem de (rota, usuário, users.data_version, parâmetros da URL). Se o
+cliente repete a ETag em If-None-Match, a resposta é 304 depois de uma única
+leitura por PK, sem executar as consultas da rota. Com RESPONSE_CACHE_SIZE > 0
+o corpo também fica em um LRU em memória com a mesma chave: qualquer escrita
+muda a versão, então as entradas antigas simplesmente deixam de ser usadas.
+"""
+import hashlib
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, make_response, request
+
+from src.services import data_version
+from src.services.cache import LRUCache
+
+
+def init_response_cache(app):
+    """Cria o cache de respostas do app (desligado com RESPONSE_CACHE_SIZE=0)"""
+    size = app.config.get('RESPONSE_CACHE_SIZE', 0)
+    app.extensions['response_cache'] = LRUCache(maxsize=size) if size > 0 else None
+
+
+def response_cache():
+    return current_app.extensions.get('response_cache')
+
+
+def _cache_key(user_id, version, daily):
+    parts = [request.endpoint, str(user_id), str(version), request.query_string.decode('latin-1')]
+    if daily:
+        # Respostas que dependem do dia (ex: decaimento da carga de treino)
+        parts.append(datetime.utcnow().date().isoformat())
+    return '|'.join(parts)
+
+
+def user_versioned(daily=False):
+    """Decorator para GETs ``/users/<user_id>/...`` que só mudam com a versão do usuário"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(user_id, *args, **kwargs):
+            version = data_version.current(user_id)
+            if version is None:
+                return view(user_id, *args, **kwargs)  # a própria rota responde 404
+
+            key = _cache_key(user_id, version, daily)
+            etag = hashlib.sha1(key.encode('utf-8')).hexdigest()[:32]
+
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                cache = response_cache()
+                cached = cache.get(key) if cache is not None else None
+                if cached is not None:
+                    body, mimetype = cached
+                    response = current_app.response_class(body, mimetype=mimetype)
+                else:
+                    response = make_response(view(user_id, *args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    if cache is not None:
+                        cache.set(key, (response.get_data(), response.mimetype))
+
+            response.set_etag(etag)
+            # O navegador pode guardar, mas deve revalidar (barato: 304) a cada uso
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
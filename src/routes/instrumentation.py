@@ -0,0 +1,114 @@
+"""
+Instrumentação das requisições e endpoint /metrics (formato do Prometheus).
+
+Cada requisição registra duração, status, número de consultas SQL e tempo
+gasto no banco, por rota (o padrão da URL, ex: /api/users/<int:user_id>, para
+não criar uma série por id). As consultas são contadas pelos eventos de cursor
+do SQLAlchemy, só dentro de requisições. A resposta leva um cabeçalho
+``Server-Timing`` com os mesmos números, visível no DevTools do navegador.
+O pool de conexões de cada engine (em uso, livres, overflow, conexões abertas
+e descartadas) é atualizado nos eventos de checkout/checkin. A agregação entre
+os workers do gunicorn está em src/services/metrics.py.
+"""
+import time
+from contextvars import ContextVar
+
+from flask import Blueprint, Response, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.services import metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+_listening = False
+
+# [início, consultas, segundos no banco] da requisição em andamento neste contexto
+_current = ContextVar('request_metrics', default=None)
+
+
+def init_instrumentation(app):
+    """Liga as métricas do app (METRICS_ENABLED) e registra /metrics"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    metrics.registry.configure(app.config.get('METRICS_DIR'))
+    _listen_queries()
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.register_blueprint(metrics_bp)
+
+
+def instrument_pool(app, engine, database):
+    """Estatísticas do pool de ``engine`` no /metrics, com o rótulo ``database``"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    pool = engine.pool
+
+    def on_connect(dbapi_connection, connection_record):
+        metrics.record_pool_state(database, pool, connects=1)
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.record_pool_state(database, pool)
+
+    def on_checkin(dbapi_connection, connection_record):
+        metrics.record_pool_state(database, pool, returning=True)
+
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.record_pool_state(database, pool, invalidated=1)
+
+    event.listen(engine, 'connect', on_connect)
+    event.listen(engine, 'checkout', on_checkout)
+    event.listen(engine, 'checkin', on_checkin)
+    event.listen(engine, 'invalidate', on_invalidate)
+
+
+@metrics_bp.route('/metrics')
+def metrics_endpoint():
+    """Métricas de todos os processos do serviço"""
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _listen_queries():
+    # Eventos na classe Engine valem para todos os engines, inclusive os criados depois
+    global _listening
+    if not _listening:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _listening = True
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('query_started')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    state = _current.get()
+    if state is not None:
+        state[1] += 1
+        state[2] += elapsed
+
+
+def _start_request():
+    _current.set([time.perf_counter(), 0, 0.0])
+
+
+def _finish_request(response):
+    state = _current.get()
+    if state is None:
+        return response
+    _current.set(None)
+    started, queries, db_seconds = state
+    elapsed = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+    metrics.record_request(request.method, route, response.status_code, elapsed, queries, db_seconds)
+
+    response.headers.add(
+        'Server-Timing',
+        f'app;dur={elapsed * 1000:.1f}, db;dur={db_seconds * 1000:.1f};desc="{queries} queries"'
+    )
+    return response
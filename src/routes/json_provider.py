@@ -0,0 +1,66 @@
+"""
+Encoder JSON das respostas: orjson quando instalado, senão o json da stdlib.
+
+Escolhido por JSON_ENCODER (auto, orjson ou stdlib). Os dois caminhos geram o
+mesmo JSON - chaves ordenadas, datas e datetimes em ISO 8601 e escalares do
+NumPy como números - então os serializadores de linhas
+(src/models/serializers.py) podem entregar datetimes sem convertê-los.
+"""
+from datetime import date, datetime
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # dependência opcional
+    orjson = None
+
+JSON_ENCODERS = ('auto', 'orjson', 'stdlib')
+
+
+def _default(o):
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    if type(o).__module__ == 'numpy' and hasattr(o, 'item'):
+        return o.item()
+    return DefaultJSONProvider.default(o)
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    default = staticmethod(_default)
+
+
+class OrjsonProvider(StdlibJSONProvider):
+    def _options(self, indent=False):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent))
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """Instala o encoder configurado em JSON_ENCODER. Retorna o nome usado."""
+    choice = app.config.get('JSON_ENCODER', 'auto')
+    if choice not in JSON_ENCODERS:
+        raise ValueError(f"JSON_ENCODER inválido: {choice} (use {', '.join(JSON_ENCODERS)})")
+
+    if choice == 'orjson' and orjson is None:
+        print("⚠️  Aviso: JSON_ENCODER=orjson mas o pacote não está instalado; usando stdlib")
+    use_orjson = orjson is not None and choice != 'stdlib'
+
+    app.json = OrjsonProvider(app) if use_orjson else StdlibJSONProvider(app)
+    return 'orjson' if use_orjson else 'stdlib'
@@ -0,0 +1,71 @@
+"""
+Paginação por cursor (keyset) para os endpoints de listagem.
+
+Em vez de OFFSET, cada página continua a partir da chave de ordenação do
+último item da página anterior, então o custo é proporcional ao tamanho da
+página e não ao histórico do usuário. O cursor é opaco para o cliente.
+"""
+import base64
+import json
+from datetime import datetime
+
+from flask import request
+from sqlalchemy import DateTime, tuple_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(token, columns):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [
+            datetime.fromisoformat(v) if isinstance(col.type, DateTime) else v
+            for v, col in zip(values, columns)
+        ]
+    except (ValueError, TypeError):
+        raise PaginationError('Cursor inválido')
+
+
+def page_args():
+    """Lê ?limit= e ?cursor= da requisição"""
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    if limit < 1:
+        raise PaginationError('limit deve ser maior que zero')
+    return min(limit, MAX_PAGE_SIZE), request.args.get('cursor')
+
+
+def keyset_page(query, columns, descending=False):
+    """Aplica ordenação e filtro de keyset à query.
+
+    ``columns`` é a chave de ordenação (deve ser única, ex: data + id).
+    Retorna (itens, next_cursor); next_cursor é None na última página.
+    """
+    limit, cursor = page_args()
+
+    key = tuple_(*columns) if len(columns) > 1 else columns[0]
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        bound = tuple_(*values) if len(columns) > 1 else values[0]
+        query = query.filter(key < bound if descending else key > bound)
+
+    order = [col.desc() if descending else col.asc() for col in columns]
+    items = query.order_by(None).order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, col.key) for col in columns])
+    return items, next_cursor
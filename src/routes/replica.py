@@ -0,0 +1,74 @@
+"""
+Leituras nas réplicas (DATABASE_REPLICA_URLS) com read-your-writes.
+
+``read_replica`` marca GETs ``/users/<user_id>/...`` que só leem: as consultas
+vão para uma réplica sorteada (src/models/replicas.py), a menos que o usuário
+tenha sido escrito há menos de REPLICA_STICKY_SECONDS - aí o primário responde,
+e o cliente vê o que acabou de gravar apesar do atraso da replicação. As
+escritas são anotadas por data_version (toda escrita visível passa por
+``bump``): na memória do processo, o que cobre as threads de jobs, e num
+cookie da resposta, que leva a janela para os outros workers do gunicorn.
+"""
+import random
+from functools import wraps
+
+from flask import current_app, g, request
+
+from src.models.engine import engine_options
+from src.models.replicas import replica_bind_keys, use_replica
+from src.services import data_version
+
+STICKY_COOKIE = 'fitia_primary'
+MAX_STICKY_USERS = 20  # ids guardados no cookie
+
+
+def init_read_replicas(app):
+    """Binds das réplicas (antes do db.init_app) e o cookie de read-your-writes"""
+    urls = app.config.get('DATABASE_REPLICA_URLS') or []
+    if not urls:
+        app.extensions['read_replicas'] = None
+        return
+    keys = replica_bind_keys(urls)
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for key, url in zip(keys, urls):
+        binds[key] = {'url': url, **engine_options(url, app.config)}
+    app.config['SQLALCHEMY_BINDS'] = binds
+    app.extensions['read_replicas'] = keys
+    app.after_request(_set_sticky_cookie)
+
+
+def read_replica():
+    """Decorator para GETs ``/users/<user_id>/...`` que podem ler de uma réplica"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(user_id, *args, **kwargs):
+            replicas = current_app.extensions.get('read_replicas')
+            if not replicas or _sticky(user_id):
+                return view(user_id, *args, **kwargs)
+            with use_replica(random.choice(replicas)):
+                return view(user_id, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _sticky(user_id):
+    if data_version.written_within(user_id, current_app.config['REPLICA_STICKY_SECONDS']):
+        return True
+    return user_id in _cookie_users()
+
+
+def _cookie_users():
+    value = request.cookies.get(STICKY_COOKIE, '')
+    return {int(uid) for uid in value.split(',') if uid.isdigit()}
+
+
+def _set_sticky_cookie(response):
+    written = g.get('written_users')
+    if written:
+        # Os escritos agora primeiro; o cookie é renovado com a janela inteira
+        users = sorted(written) + sorted(_cookie_users() - written)
+        response.set_cookie(
+            STICKY_COOKIE, ','.join(map(str, users[:MAX_STICKY_USERS])),
+            max_age=current_app.config['REPLICA_STICKY_SECONDS'], httponly=True, samesite='Lax'
+        )
+    return response
@@ -1,11 +1,20 @@
-from flask import Blueprint, request, jsonify, send_from_directory
-from src.models.user import User, TrainingPlan, Workout, UserFeedback, UserExam, db
+from flask import Blueprint, current_app, request, jsonify, send_file, url_for
+from src.models.user import User, TrainingPlan, Workout, UserFeedback, UserExam, UserProgress, PlanJob, db
+from src.models.serializers import FieldSelectionError, WORKOUT_ROWS, training_plans_query, serialize_plan_rows
+from src.routes.pagination import PaginationError, keyset_page
+from src.routes.http_cache import user_versioned
+from src.routes.replica import read_replica
 from src.services.training_ai import TrainingAIService
+from src.services import progress
+from src.services.exam_storage import ExamStorage
+from src.services import data_version, plan_jobs, training_load
 from datetime import datetime
-from werkzeug.utils import secure_filename
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.security import safe_join
 import json
 import os
-import uuid
 
 training_bp = Blueprint('training', __name__)
 ai_service = TrainingAIService()
@@ -14,9 +23,23 @@ ai_service = TrainingAIService()
 UPLOAD_FOLDER = 'uploads/exams'
 ALLOWED_EXTENSIONS = {'pdf'}
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+FORM_OVERHEAD = 64 * 1024  # Campos do formulário e cabeçalhos do multipart
+EXAM_PDF_MAX_AGE = 7 * 24 * 3600  # Cache do navegador para PDFs (segundos)
 
-# Criar pasta de uploads se não existir
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Conclusão de treinos em lote
+MAX_BATCH_COMPLETIONS = 500
+BATCH_COMPLETION_FIELDS = ('rpe_realizado', 'fc_media', 'tempo_realizado')
+
+# Importação de atividades (GPX/TCX/CSV)
+MAX_ACTIVITY_FILE_SIZE = 100 * 1024 * 1024  # 100MB
+
+# Cria a pasta de uploads se não existir
+exam_storage = ExamStorage(UPLOAD_FOLDER, MAX_FILE_SIZE)
+
+@training_bp.errorhandler(PaginationError)
+@training_bp.errorhandler(FieldSelectionError)
+def handle_query_param_error(e):
+    return jsonify({'error': str(e)}), 400
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -55,10 +78,10 @@ def create_user():
         
         db.session.add(user)
         db.session.commit()
+        data_version.mark_written(user.id)
         
         # Calcular ritmos de treino
-        user_data = user.to_dict()
-        ritmos = ai_service.calculate_training_paces(user_data)
+        ritmos = ai_service.get_training_paces(user)
         
         return jsonify({
             'user': user.to_dict(),
@@ -71,6 +94,8 @@ def create_user():
         return jsonify({'error': str(e)}), 500
 
 @training_bp.route('/users/<int:user_id>', methods=['GET'])
+@read_replica()
+@user_versioned()
 def get_user(user_id):
     """Obtém dados do usuário"""
     user = User.query.get_or_404(user_id)
@@ -85,6 +110,7 @@ def generate_training_plan(user_id, week_number):
         # Validar dados do usuário
         if not user.performance_factor:
             user.performance_factor = 1.0
+            data_version.bump(user_id)
             db.session.commit()
         
         # Verificar se já existe plano para esta semana
@@ -99,11 +125,24 @@ def generate_training_plan(user_id, week_number):
                 'message': 'Plano já existe para esta semana'
             })
         
+        # ?async=1: enfileirar e responder sem esperar o cálculo
+        if wants_async():
+            return job_accepted(*plan_jobs.enqueue(user_id, week_number))
+        
         # Analisar exames médicos antes de gerar o plano
         exam_adjustments = ai_service.analyze_medical_exams(user_id)
         
         # Gerar novo plano
-        training_plan = ai_service.generate_weekly_plan(user_id, week_number)
+        try:
+            training_plan = ai_service.generate_weekly_plan(user_id, week_number)
+        except IntegrityError:
+            # Requisição concorrente criou a mesma semana (índice único user_id, semana)
+            db.session.rollback()
+            existing_plan = TrainingPlan.query.filter_by(user_id=user_id, semana=week_number).first()
+            return jsonify({
+                'training_plan': existing_plan.to_dict(),
+                'message': 'Plano já existe para esta semana'
+            })
         
         if not training_plan:
             return jsonify({'error': 'Erro ao gerar plano de treino. Por favor, verifique os dados do usuário.'}), 500
@@ -121,15 +160,70 @@ def generate_training_plan(user_id, week_number):
         print(traceback.format_exc())
         return jsonify({'error': f'Erro ao gerar plano: {str(e)}'}), 500
 
+def wants_async():
+    """Cliente pediu processamento assíncrono (?async=1 ou Prefer: respond-async)"""
+    flag = request.args.get('async', '').lower() in ('1', 'true', 'yes')
+    return flag or 'respond-async' in request.headers.get('Prefer', '')
+
+def job_accepted(job, created):
+    """Resposta 202 com o job e o endereço para acompanhar o status"""
+    status_url = url_for('training.get_plan_job', job_id=job.id)
+    return jsonify({
+        'job': job.to_dict(),
+        'status_url': status_url,
+        'message': 'Geração de plano enfileirada' if created else 'Geração já está na fila'
+    }), 202, {'Location': status_url}
+
+@training_bp.route('/jobs/<int:job_id>', methods=['GET'])
+def get_plan_job(job_id):
+    """Status e progresso de um job de geração de planos"""
+    job = db.session.get(PlanJob, job_id)
+    if job is None:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    return jsonify({'job': job.to_dict()})
+
+@training_bp.route('/users/<int:user_id>/training-plans/season', methods=['POST'])
+def generate_season_plan(user_id):
+    """Gera de uma vez todas as semanas da temporada que ainda não têm plano"""
+    try:
+        User.query.get_or_404(user_id)
+
+        if wants_async():
+            return job_accepted(*plan_jobs.enqueue(user_id))
+
+        exam_adjustments = ai_service.analyze_medical_exams(user_id)
+        plans = ai_service.generate_season_plan(user_id)
+
+        return jsonify({
+            'weeks_created': [plan['semana'] for plan in plans],
+            'workouts_created': sum(len(plan['workouts']) for plan in plans),
+            'exam_adjustments': exam_adjustments,
+            'message': 'Temporada de treinos gerada com sucesso!' if plans else 'Todas as semanas já possuem plano'
+        }), 201 if plans else 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro ao gerar temporada: {str(e)}'}), 500
+
 @training_bp.route('/users/<int:user_id>/training-plans', methods=['GET'])
+@read_replica()
+@user_versioned()
 def get_user_training_plans(user_id):
-    """Obtém todos os planos de treino do usuário"""
+    """Obtém os planos de treino do usuário, paginados por semana (?limit=&cursor=,
+    opcional: ?semana_inicio=&semana_fim= e ?fields=id,tipo,... para os treinos)"""
     user = User.query.get_or_404(user_id)
-    plans = TrainingPlan.query.filter_by(user_id=user_id).order_by(TrainingPlan.semana).all()
+    workout_fields = WORKOUT_ROWS.select_fields(request.args.get('fields'))
+    query = training_plans_query(
+        user_id,
+        semana_inicio=request.args.get('semana_inicio', type=int),
+        semana_fim=request.args.get('semana_fim', type=int)
+    )
+    plans, next_cursor = keyset_page(query, [TrainingPlan.semana])
     
     return jsonify({
         'user': user.to_dict(),
-        'training_plans': [plan.to_dict() for plan in plans]
+        'training_plans': serialize_plan_rows(plans, workout_fields),
+        'next_cursor': next_cursor
     })
 
 @training_bp.route('/workouts/<int:workout_id>/complete', methods=['POST'])
@@ -139,6 +233,8 @@ def complete_workout(workout_id):
         data = request.get_json()
         workout = Workout.query.get_or_404(workout_id)
         
+        was_completed = workout.completed
+        session_before = training_load.workout_session(workout)
         workout.completed = True
         workout.completed_at = datetime.utcnow()
         
@@ -149,6 +245,10 @@ def complete_workout(workout_id):
         if 'tempo_realizado' in data:
             workout.tempo_realizado = data['tempo_realizado']
         
+        if not was_completed:
+            progress.record_workout_completed(workout.user_id, workout.distancia_km, workout.completed_at)
+        training_load.record_sessions(workout.user_id, [(session_before, training_load.workout_session(workout))])
+        data_version.bump(workout.user_id)
         db.session.commit()
         
         return jsonify({
@@ -160,6 +260,170 @@ def complete_workout(workout_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@training_bp.route('/workouts/complete-batch', methods=['POST'])
+def complete_workouts_batch():
+    """Marca vários treinos como completos em uma transação (ex: sincronização do relógio).
+    
+    Corpo: {"workouts": [{"id": 1, "rpe_realizado": 6, "fc_media": 150, "tempo_realizado": 32.5}, ...]}
+    Retorna o status de cada item: completed, updated (já estava completo),
+    not_found ou invalid.
+    """
+    try:
+        data = request.get_json() or {}
+        items = data.get('workouts')
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'Campo obrigatório: workouts (lista não vazia)'}), 400
+        if len(items) > MAX_BATCH_COMPLETIONS:
+            return jsonify({'error': f'Máximo de {MAX_BATCH_COMPLETIONS} treinos por requisição'}), 400
+        
+        # Validar itens antes de tocar no banco
+        results = []
+        valid = {}
+        for item in items:
+            workout_id = item.get('id') if isinstance(item, dict) else None
+            if not isinstance(workout_id, int) or isinstance(workout_id, bool):
+                results.append({'id': workout_id, 'status': 'invalid', 'error': 'id inválido'})
+                continue
+            if workout_id in valid:
+                results.append({'id': workout_id, 'status': 'invalid', 'error': 'id repetido no lote'})
+                continue
+            bad = [
+                field for field in BATCH_COMPLETION_FIELDS
+                if item.get(field) is not None and not isinstance(item[field], (int, float))
+            ]
+            if bad:
+                results.append({'id': workout_id, 'status': 'invalid', 'error': f'Valor inválido: {bad[0]}'})
+                continue
+            valid[workout_id] = item
+            results.append({'id': workout_id, 'status': None})
+        
+        # Estado atual dos treinos do lote (uma consulta)
+        current = {
+            row.id: row for row in db.session.execute(
+                select(Workout.id, Workout.user_id, Workout.completed, Workout.completed_at,
+                       Workout.distancia_km, Workout.ritmo_alvo,
+                       *[getattr(Workout, field) for field in BATCH_COMPLETION_FIELDS])
+                .where(Workout.id.in_(list(valid)))
+            )
+        }
+        
+        now = datetime.utcnow()
+        rows = []
+        newly_completed = {}
+        load_changes = {}
+        for result in results:
+            if result['status'] is not None:
+                continue
+            row = current.get(result['id'])
+            if row is None:
+                result['status'] = 'not_found'
+                continue
+            
+            item = valid[row.id]
+            update_row = {'id': row.id, 'completed': True, 'completed_at': now}
+            for field in BATCH_COMPLETION_FIELDS:
+                update_row[field] = item[field] if field in item else getattr(row, field)
+            rows.append(update_row)
+            load_changes.setdefault(row.user_id, []).append((
+                training_load.workout_session(row),
+                training_load.session_of(True, now, update_row['rpe_realizado'], update_row['tempo_realizado'],
+                                         update_row['fc_media'], row.distancia_km, row.ritmo_alvo)
+            ))
+            
+            result['status'] = 'updated' if row.completed else 'completed'
+            if not row.completed:
+                count, km = newly_completed.get(row.user_id, (0, 0.0))
+                newly_completed[row.user_id] = (count + 1, km + row.distancia_km)
+        
+        # Todas as linhas têm as mesmas colunas: um único UPDATE executemany por PK
+        if rows:
+            db.session.execute(update(Workout), rows)
+        for uid, (count, km) in newly_completed.items():
+            progress.record_workouts_completed(uid, count, km, now)
+        for uid, changes in load_changes.items():
+            training_load.record_sessions(uid, changes)
+        data_version.bump(*load_changes)
+        db.session.commit()
+        
+        return jsonify({
+            'results': results,
+            'completed': sum(1 for r in results if r['status'] == 'completed'),
+            'updated': sum(1 for r in results if r['status'] == 'updated'),
+            'failed': sum(1 for r in results if r['status'] in ('not_found', 'invalid')),
+            'message': 'Treinos sincronizados!'
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@training_bp.route('/users/<int:user_id>/activities', methods=['POST'])
+def import_activity(user_id):
+    """Importa uma atividade (GPX, TCX ou CSV) e completa o treino correspondente.
+    
+    Formulário multipart: activity_file (obrigatório), format, workout_id e
+    rpe_realizado (opcionais). Sem workout_id, o treino é escolhido entre os
+    pendentes da semana atual pela distância e ritmo.
+    """
+    # Importado aqui: o parser usa NumPy/pandas, que não entram no cold start
+    from src.services import activity_import
+
+    try:
+        User.query.get_or_404(user_id)
+        
+        if request.content_length and request.content_length > MAX_ACTIVITY_FILE_SIZE + FORM_OVERHEAD:
+            return jsonify({'error': f'Arquivo maior que {MAX_ACTIVITY_FILE_SIZE // (1024 * 1024)}MB'}), 413
+        
+        # O Werkzeug grava arquivos grandes em disco; o parser lê em streaming
+        file = request.files.get('activity_file')
+        if file is None or file.filename == '':
+            return jsonify({'error': 'Nenhum arquivo de atividade enviado'}), 400
+        
+        try:
+            fmt = activity_import.detect_format(file.filename, request.form.get('format'))
+            summary = activity_import.summarize_activity(file.stream, fmt, file.filename)
+        except activity_import.ActivityImportError as e:
+            return jsonify({'error': str(e)}), 400
+        activity = summary.to_dict()
+        
+        workout_id = request.form.get('workout_id', type=int)
+        if workout_id is not None:
+            workout = Workout.query.filter_by(id=workout_id, user_id=user_id).first_or_404()
+        else:
+            workout = activity_import.match_workout(user_id, summary)
+            if workout is None:
+                return jsonify({
+                    'activity': activity,
+                    'error': 'Nenhum treino pendente compatível com a atividade'
+                }), 404
+        
+        was_completed = workout.completed
+        session_before = training_load.workout_session(workout)
+        workout.completed = True
+        workout.completed_at = summary.end_datetime or datetime.utcnow()
+        workout.tempo_realizado = activity['tempo_movimento_min']
+        if activity['fc_media'] is not None:
+            workout.fc_media = activity['fc_media']
+        rpe = request.form.get('rpe_realizado', type=int)
+        if rpe is not None:
+            workout.rpe_realizado = rpe
+        
+        if not was_completed:
+            progress.record_workout_completed(workout.user_id, workout.distancia_km, workout.completed_at)
+        training_load.record_sessions(workout.user_id, [(session_before, training_load.workout_session(workout))])
+        data_version.bump(workout.user_id)
+        db.session.commit()
+        
+        return jsonify({
+            'activity': activity,
+            'workout': workout.to_dict(),
+            'message': 'Atividade importada e treino marcado como completo!'
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @training_bp.route('/users/<int:user_id>/feedback', methods=['POST'])
 def submit_feedback(user_id):
     """Submete feedback semanal e atualiza fator de performance"""
@@ -188,21 +452,35 @@ def submit_feedback(user_id):
         return jsonify({'error': str(e)}), 500
 
 @training_bp.route('/users/<int:user_id>/feedback', methods=['GET'])
+@read_replica()
+@user_versioned()
 def get_user_feedbacks(user_id):
-    """Retorna histórico de feedbacks do usuário"""
+    """Retorna histórico de feedbacks do usuário, por semana, paginado (?limit=&cursor=).
+
+    ``total`` conta todos os feedbacks do usuário, não só os da página.
+    """
     try:
         user = User.query.get(user_id)
         if not user:
             return jsonify({'error': 'Usuário não encontrado'}), 404
         
-        feedbacks = UserFeedback.query.filter_by(user_id=user_id).order_by(UserFeedback.semana.asc()).all()
+        feedbacks, next_cursor = keyset_page(
+            UserFeedback.query.filter_by(user_id=user_id),
+            [UserFeedback.semana, UserFeedback.id]
+        )
+        total = db.session.scalar(
+            select(func.count()).select_from(UserFeedback).where(UserFeedback.user_id == user_id)
+        )
         
         return jsonify({
             'feedbacks': [f.to_dict() for f in feedbacks],
-            'total': len(feedbacks),
+            'total': total,
+            'next_cursor': next_cursor,
             'current_performance_factor': user.performance_factor
         })
         
+    except PaginationError:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -226,7 +504,9 @@ def add_user_exam(user_id):
         )
         
         db.session.add(exam)
+        data_version.bump(user_id)
         db.session.commit()
+        ai_service.invalidate_exam_adjustments(user_id)
         
         return jsonify({
             'exam': exam.to_dict(),
@@ -238,27 +518,44 @@ def add_user_exam(user_id):
         return jsonify({'error': str(e)}), 500
 
 @training_bp.route('/users/<int:user_id>/exams', methods=['GET'])
+@read_replica()
+@user_versioned()
 def get_user_exams(user_id):
-    """Obtém todos os exames do usuário"""
+    """Obtém os exames do usuário, do mais recente ao mais antigo (?limit=&cursor=)"""
     user = User.query.get_or_404(user_id)
-    exams = UserExam.query.filter_by(user_id=user_id).order_by(UserExam.data_exame.desc()).all()
+    exams, next_cursor = keyset_page(
+        UserExam.query.filter_by(user_id=user_id),
+        [UserExam.data_exame, UserExam.id],
+        descending=True
+    )
     
     return jsonify({
         'user_id': user_id,
-        'exams': [exam.to_dict() for exam in exams]
+        'exams': [exam.to_dict() for exam in exams],
+        'next_cursor': next_cursor
     })
 
 @training_bp.route('/users/<int:user_id>/exams/upload-pdf', methods=['POST'])
 def upload_exam_pdf(user_id):
-    """Upload de PDF de exame médico"""
+    """Upload de PDF de exame médico (gravado em disco à medida que é recebido)"""
+    writers = []
     try:
         user = User.query.get_or_404(user_id)
         
+        # Rejeitar antes de ler o corpo quando o tamanho declarado já excede o limite
+        if request.content_length and request.content_length > MAX_FILE_SIZE + FORM_OVERHEAD:
+            return jsonify({'error': f'Arquivo maior que {MAX_FILE_SIZE // (1024 * 1024)}MB'}), 413
+        
+        try:
+            form, files, writers = exam_storage.parse_upload(request.environ, FORM_OVERHEAD)
+        except RequestEntityTooLarge:
+            return jsonify({'error': f'Arquivo maior que {MAX_FILE_SIZE // (1024 * 1024)}MB'}), 413
+        
         # Verificar se arquivo foi enviado
-        if 'pdf_file' not in request.files:
+        if 'pdf_file' not in files:
             return jsonify({'error': 'Nenhum arquivo PDF enviado'}), 400
         
-        file = request.files['pdf_file']
+        file = files['pdf_file']
         
         if file.filename == '':
             return jsonify({'error': 'Nenhum arquivo selecionado'}), 400
@@ -266,29 +563,31 @@ def upload_exam_pdf(user_id):
         if not allowed_file(file.filename):
             return jsonify({'error': 'Apenas arquivos PDF são permitidos'}), 400
         
-        # Gerar nome único para o arquivo
-        filename = secure_filename(file.filename)
-        unique_filename = f"{user_id}_{uuid.uuid4().hex}_{filename}"
-        filepath = os.path.join(UPLOAD_FOLDER, unique_filename)
-        
-        # Salvar arquivo
-        file.save(filepath)
+        # Nome do arquivo = SHA-256 do conteúdo (PDFs idênticos são guardados uma vez)
+        writer = file.stream
+        stored_filename, sha256 = exam_storage.prepare(writer)
         
         # Obter dados do formulário
-        tipo_exame = request.form.get('tipo_exame', 'bioimpedancia')
-        data_exame = request.form.get('data_exame', datetime.now().isoformat())
+        tipo_exame = form.get('tipo_exame', 'bioimpedancia')
+        data_exame = form.get('data_exame', datetime.now().isoformat())
         
         # Criar registro no banco
         exam = UserExam(
             user_id=user_id,
             tipo_exame=tipo_exame,
             dados_exame=json.dumps({}),  # Vazio, pois os dados estão no PDF
-            pdf_filename=unique_filename,
+            pdf_filename=stored_filename,
+            pdf_sha256=sha256,
             data_exame=datetime.fromisoformat(data_exame.split('T')[0])
         )
         
         db.session.add(exam)
+        data_version.bump(user_id)
         db.session.commit()
+        # Só agora o arquivo final aparece; uma falha antes disso descarta apenas
+        # o temporário, nunca um PDF que outros exames referenciam
+        exam_storage.store(writer, stored_filename)
+        ai_service.invalidate_exam_adjustments(user_id)
         
         return jsonify({
             'exam': exam.to_dict(),
@@ -297,51 +596,124 @@ def upload_exam_pdf(user_id):
         
     except Exception as e:
         db.session.rollback()
-        # Remover arquivo se houver erro
-        if 'filepath' in locals() and os.path.exists(filepath):
-            os.remove(filepath)
         return jsonify({'error': str(e)}), 500
+    
+    finally:
+        # Temporários não publicados (campos extras, erros de validação ou do banco)
+        for writer in writers:
+            writer.discard()
 
 @training_bp.route('/exams/pdf/<filename>', methods=['GET'])
 def download_exam_pdf(filename):
-    """Download de PDF de exame"""
+    """Download de PDF de exame (ETag, If-None-Match/304 e Range)"""
     try:
         # Validar que o arquivo existe e pertence a um exame válido
         exam = UserExam.query.filter_by(pdf_filename=filename).first()
         if not exam:
             return jsonify({'error': 'Arquivo não encontrado'}), 404
         
-        return send_from_directory(UPLOAD_FOLDER, filename, as_attachment=True)
+        path = safe_join(os.path.abspath(UPLOAD_FOLDER), filename)
+        if path is None or not os.path.isfile(path):
+            return jsonify({'error': 'Arquivo não encontrado'}), 404
+        
+        # ETag forte: hash do conteúdo (arquivos antigos, sem hash: mtime + tamanho)
+        if exam.pdf_sha256:
+            etag = exam.pdf_sha256
+        else:
+            stat = os.stat(path)
+            etag = f"{int(stat.st_mtime)}-{stat.st_size}"
+        
+        offload = current_app.config.get('EXAM_PDF_OFFLOAD', '')
+        if offload:
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                # O proxy da frente (nginx/Apache) envia o arquivo e trata Range;
+                # o worker é liberado imediatamente
+                response = current_app.response_class(mimetype='application/pdf')
+                response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+                if offload == 'x-accel':
+                    prefix = current_app.config.get('EXAM_PDF_ACCEL_PREFIX', '/protected/exams/')
+                    response.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + filename
+                else:
+                    response.headers['X-Sendfile'] = path
+            response.set_etag(etag)
+        else:
+            response = send_file(
+                path,
+                mimetype='application/pdf',
+                as_attachment=True,
+                download_name=filename,
+                conditional=True,
+                etag=etag
+            )
+        
+        # Conteúdo endereçado por nome é imutável; dado médico: nunca em cache público
+        response.cache_control.no_cache = None
+        response.cache_control.public = False
+        response.cache_control.private = True
+        response.cache_control.max_age = EXAM_PDF_MAX_AGE
+        return response
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @training_bp.route('/users/<int:user_id>/progress', methods=['GET'])
+@read_replica()
+@user_versioned()
 def get_user_progress(user_id):
-    """Obtém progresso geral do usuário"""
-    user = User.query.get_or_404(user_id)
+    """Obtém progresso geral do usuário (resumo mantido em user_progress)"""
+    row = db.session.query(User, UserProgress)\
+        .outerjoin(UserProgress, UserProgress.user_id == User.id)\
+        .filter(User.id == user_id).first()
+    if row is None:
+        return jsonify({'error': 'Usuário não encontrado'}), 404
+    user, summary = row
     
-    # Estatísticas gerais
-    total_plans = TrainingPlan.query.filter_by(user_id=user_id).count()
-    total_workouts = Workout.query.filter_by(user_id=user_id).count()
-    completed_workouts = Workout.query.filter_by(user_id=user_id, completed=True).count()
-    
-    # Feedback recente
-    recent_feedback = UserFeedback.query.filter_by(user_id=user_id)\
-        .order_by(UserFeedback.created_at.desc()).limit(5).all()
+    if summary is None:
+        db.session().use_primary()  # o resumo é recalculado a partir do primário
+        progress.rebuild_user_progress(user_id=user_id)
+        db.session.commit()
+        summary = db.session.get(UserProgress, user_id)
+    stats = summary.to_dict()
     
     # Progresso em relação ao objetivo
-    progress_percentage = (total_plans / user.semanas_treino) * 100 if user.semanas_treino > 0 else 0
+    progress_percentage = (stats['total_plans'] / user.semanas_treino) * 100 if user.semanas_treino > 0 else 0
     
     return jsonify({
         'user': user.to_dict(),
         'statistics': {
-            'total_plans': total_plans,
-            'total_workouts': total_workouts,
-            'completed_workouts': completed_workouts,
-            'completion_rate': (completed_workouts / total_workouts * 100) if total_workouts > 0 else 0,
+            'total_plans': stats['total_plans'],
+            'total_workouts': stats['total_workouts'],
+            'completed_workouts': stats['completed_workouts'],
+            'completed_km': stats['completed_km'],
+            'last_activity_at': stats['last_activity_at'],
+            'completion_rate': (stats['completed_workouts'] / stats['total_workouts'] * 100) if stats['total_workouts'] > 0 else 0,
             'progress_percentage': min(100, progress_percentage)
         },
-        'recent_feedback': [feedback.to_dict() for feedback in recent_feedback]
+        'recent_feedback': stats['recent_feedback']
     })
 
+@training_bp.route('/users/<int:user_id>/load', methods=['GET'])
+@read_replica()
+@user_versioned(daily=True)
+def get_training_load(user_id):
+    """Carga de treino diária (sRPE e TRIMP) com ATL, CTL e TSB.
+    
+    Parâmetros: dias (janela até hoje, padrão 90).
+    """
+    if db.session.get(User, user_id) is None:
+        return jsonify({'error': 'Usuário não encontrado'}), 404
+    
+    dias = request.args.get('dias', training_load.DEFAULT_WINDOW_DAYS, type=int)
+    if dias < 1 or dias > training_load.MAX_WINDOW_DAYS:
+        return jsonify({'error': f'dias deve estar entre 1 e {training_load.MAX_WINDOW_DAYS}'}), 400
+    
+    series = training_load.load_series(user_id, dias)
+    db.session.commit()  # grava o recálculo de um usuário sem histórico, se houve
+    return jsonify({
+        'user_id': user_id,
+        'dias': dias,
+        'atual': series[-1],
+        'series': series
+    })
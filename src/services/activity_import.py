@@ -0,0 +1,373 @@
+"""
+Importação de atividades de relógios/apps (GPX, TCX e CSV por segundo).
+
+Os arquivos são lidos em streaming: o XML é entregue ao parser (expat) em
+blocos e só os campos de cada ponto são guardados, sem montar a árvore; o CSV
+é lido com ``read_csv`` em blocos. Os pontos são agrupados em blocos de
+``CHUNK_POINTS`` e resumidos com operações vetorizadas, então a memória usada
+não depende da duração da atividade - só o último ponto de cada bloco é
+guardado para emendar com o próximo.
+"""
+import codecs
+import gzip
+import math
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+
+from src.models.user import db, TrainingPlan, Workout
+
+ACTIVITY_FORMATS = ('gpx', 'tcx', 'csv')
+CHUNK_POINTS = 10000
+XML_READ_SIZE = 64 * 1024
+
+EARTH_RADIUS_M = 6371008.8
+MIN_MOVING_SPEED = 0.5  # m/s - abaixo disso o trecho conta como parado
+MAX_SEGMENT_GAP = 300  # s - intervalos maiores (relógio pausado/sem sinal) não contam
+# Tempo numérico no CSV: a partir daqui é epoch (2001-09-09 em s; em ms acima de
+# EPOCH_MS_MIN); abaixo, segundos decorridos desde o início da atividade
+EPOCH_MIN_SECONDS = 1e9
+EPOCH_MS_MIN = 1e11
+
+# Diferença relativa máxima de distância para casar atividade e treino
+MATCH_DISTANCE_TOLERANCE = 0.5
+
+# Nomes aceitos para as colunas do CSV
+CSV_COLUMNS = {
+    'time': 'time', 'timestamp': 'time', 'datetime': 'time',
+    'lat': 'lat', 'latitude': 'lat',
+    'lon': 'lon', 'lng': 'lon', 'longitude': 'lon',
+    'distance': 'distance', 'distance_m': 'distance',
+    'hr': 'hr', 'heart_rate': 'hr', 'heartrate': 'hr', 'fc': 'hr',
+}
+
+
+class ActivityImportError(ValueError):
+    pass
+
+
+def detect_format(filename, declared=None):
+    """Formato pelo campo ``format`` ou pela extensão (aceita .gz)"""
+    if declared:
+        fmt = declared.lower()
+    else:
+        name = (filename or '').lower()
+        if name.endswith('.gz'):
+            name = name[:-3]
+        fmt = name.rsplit('.', 1)[-1] if '.' in name else ''
+    if fmt not in ACTIVITY_FORMATS:
+        raise ActivityImportError(f"Formato não suportado: use {', '.join(ACTIVITY_FORMATS)}")
+    return fmt
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Distância em metros entre arrays de coordenadas (graus)"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class ActivitySummary:
+    """Acumula distância, tempo em movimento e FC bloco a bloco"""
+
+    def __init__(self):
+        self.points = 0
+        self.start = None
+        self.end = None
+        self.distance_m = 0.0
+        self.moving_s = 0.0
+        self.hr_weighted = 0.0
+        self.hr_seconds = 0.0
+        self.relative_time = False  # tempos em segundos decorridos, sem data
+        self._last = None  # último ponto do bloco anterior: (t, lat, lon, dist)
+
+    def add_chunk(self, times, lat, lon, hr, distance):
+        """Arrays do mesmo tamanho; ``times`` em segundos (epoch ou decorridos), ausentes = NaN"""
+        valid = ~np.isnan(times)
+        times, lat, lon, hr, distance = (arr[valid] for arr in (times, lat, lon, hr, distance))
+        if not len(times):
+            return
+
+        self.points += len(times)
+        if self.start is None:
+            self.start = times[0]
+        self.end = max(self.end if self.end is not None else times[-1], times[-1])
+
+        if self._last is not None:
+            t0, lat0, lon0, dist0 = self._last
+            times = np.concatenate(([t0], times))
+            lat = np.concatenate(([lat0], lat))
+            lon = np.concatenate(([lon0], lon))
+            hr = np.concatenate(([np.nan], hr))
+            distance = np.concatenate(([dist0], distance))
+        self._last = (times[-1], lat[-1], lon[-1], distance[-1])
+
+        dt = np.diff(times)
+        # Distância do próprio relógio quando houver; senão, pelas coordenadas
+        segment = np.diff(distance)
+        from_gps = np.isnan(segment)
+        segment[from_gps] = haversine_m(lat[:-1], lon[:-1], lat[1:], lon[1:])[from_gps]
+        segment = np.nan_to_num(segment, nan=0.0)
+        segment[segment < 0] = 0.0
+
+        counted = (dt > 0) & (dt <= MAX_SEGMENT_GAP)
+        speed = np.divide(segment, dt, out=np.zeros_like(segment), where=dt > 0)
+        moving = counted & (speed >= MIN_MOVING_SPEED)
+
+        self.distance_m += float(segment[counted].sum())
+        self.moving_s += float(dt[moving].sum())
+
+        # FC média ponderada pelo tempo, só nos trechos em movimento
+        segment_hr = hr[1:]
+        with_hr = moving & ~np.isnan(segment_hr)
+        self.hr_weighted += float((segment_hr[with_hr] * dt[with_hr]).sum())
+        self.hr_seconds += float(dt[with_hr].sum())
+
+    def to_dict(self):
+        distancia_km = self.distance_m / 1000
+        tempo_min = self.moving_s / 60
+        return {
+            'inicio': self._isoformat(self.start),
+            'fim': self._isoformat(self.end),
+            'pontos': self.points,
+            'distancia_km': round(distancia_km, 2),
+            'tempo_movimento_min': round(tempo_min, 2),
+            'tempo_total_min': round(float(self.end - self.start) / 60, 2) if self.points else 0.0,
+            'ritmo_medio': round(tempo_min / distancia_km, 2) if distancia_km > 0 else None,
+            'fc_media': round(self.hr_weighted / self.hr_seconds, 1) if self.hr_seconds else None,
+        }
+
+    @property
+    def end_datetime(self):
+        """Fim da atividade (None se o arquivo só tem tempos decorridos)"""
+        if self.end is None or self.relative_time:
+            return None
+        return pd.Timestamp(self.end, unit='s').to_pydatetime()
+
+    def _isoformat(self, seconds):
+        if seconds is None or self.relative_time:
+            return None
+        return pd.Timestamp(seconds, unit='s').isoformat()
+
+
+def _to_seconds(values):
+    """Coluna de tempo -> (segundos, absolutos?); inválidos viram NaN.
+
+    Texto é lido como ISO 8601 (UTC). Números são epoch em segundos ou ms, ou,
+    abaixo de EPOCH_MIN_SECONDS, segundos decorridos desde o início (exportações
+    por segundo). Uma coluna preenchida sem nenhum tempo reconhecível é erro.
+    """
+    series = pd.Series(values, dtype=object)
+    present = series.notna() & (series.astype(str).str.strip() != '')
+    numeric = pd.to_numeric(series, errors='coerce')
+    if present.any() and numeric[present].notna().all():
+        seconds = numeric.to_numpy(dtype=float, na_value=np.nan)
+        largest = np.nanmax(seconds)
+        if largest >= EPOCH_MS_MIN:
+            return seconds / 1000, True
+        return seconds, largest >= EPOCH_MIN_SECONDS
+
+    parsed = pd.to_datetime(series, utc=True, errors='coerce', format='ISO8601')
+    seconds = ((parsed - pd.Timestamp(0, tz='UTC')) / pd.Timedelta(seconds=1)).to_numpy(dtype=float, na_value=np.nan)
+    if present.any() and np.isnan(seconds[present.to_numpy()]).all():
+        sample = series[present].iloc[0]
+        raise ActivityImportError(f'Tempo não reconhecido: {sample!r} (use ISO 8601, epoch ou segundos)')
+    return seconds, True
+
+
+def _to_float(values):
+    return pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+
+class _PointBuffer:
+    """Pontos crus de um bloco; ``flush`` converte em arrays e resume"""
+
+    def __init__(self, summary):
+        self.summary = summary
+        self.reset()
+
+    def reset(self):
+        self.time, self.lat, self.lon, self.hr, self.distance = [], [], [], [], []
+
+    def append(self, time, lat, lon, hr, distance):
+        self.time.append(time)
+        self.lat.append(lat)
+        self.lon.append(lon)
+        self.hr.append(hr)
+        self.distance.append(distance)
+        if len(self.time) >= CHUNK_POINTS:
+            self.flush()
+
+    def flush(self):
+        if self.time:
+            times, absolute = _to_seconds(self.time)
+            self.summary.relative_time |= not absolute
+            self.summary.add_chunk(
+                times,
+                _to_float(self.lat), _to_float(self.lon),
+                _to_float(self.hr), _to_float(self.distance)
+            )
+        self.reset()
+
+
+class _TrackTarget:
+    """Alvo do XMLParser: monta só os campos de cada ponto, sem construir árvore"""
+
+    def __init__(self, point_tag, fields, attributes, buffer):
+        self.point_tag = point_tag
+        self.fields = fields  # nome local do elemento -> campo do ponto
+        self.attributes = attributes  # atributo do ponto -> campo do ponto
+        self.buffer = buffer
+        self.point = None
+        self.field = None
+        self.text = []
+        self._names = {}
+
+    def _local(self, tag):
+        name = self._names.get(tag)
+        if name is None:
+            name = self._names[tag] = tag.rsplit('}', 1)[-1]
+        return name
+
+    def start(self, tag, attrib):
+        name = self._local(tag)
+        if name == self.point_tag:
+            self.point = {field: attrib.get(attr) for attr, field in self.attributes.items()}
+        elif self.point is not None and name in self.fields:
+            self.field = self.fields[name]
+            self.text = []
+
+    def data(self, text):
+        if self.field is not None:
+            self.text.append(text)
+
+    def end(self, tag):
+        name = self._local(tag)
+        if self.field is not None and self.fields.get(name) == self.field:
+            self.point.setdefault(self.field, ''.join(self.text).strip())
+            self.field = None
+        elif name == self.point_tag and self.point is not None:
+            point = self.point
+            self.buffer.append(point.get('time'), point.get('lat'), point.get('lon'),
+                               point.get('hr'), point.get('distance'))
+            self.point = None
+
+    def close(self):
+        return None
+
+
+def _parse_xml(stream, target):
+    """Alimenta o parser (expat) em blocos: memória constante para qualquer tamanho"""
+    parser = ET.XMLParser(target=target)
+    while True:
+        block = stream.read(XML_READ_SIZE)
+        if not block:
+            break
+        parser.feed(block)
+    parser.close()
+
+
+def _parse_gpx(stream, buffer):
+    _parse_xml(stream, _TrackTarget(
+        'trkpt', {'time': 'time', 'hr': 'hr'}, {'lat': 'lat', 'lon': 'lon'}, buffer
+    ))
+
+
+def _parse_tcx(stream, buffer):
+    _parse_xml(stream, _TrackTarget(
+        'Trackpoint',
+        {'Time': 'time', 'LatitudeDegrees': 'lat', 'LongitudeDegrees': 'lon',
+         'Value': 'hr', 'DistanceMeters': 'distance'},
+        {}, buffer
+    ))
+
+
+def _parse_csv(stream, buffer):
+    """CSV com cabeçalho: tempo + (lat/lon ou distância acumulada em metros), FC opcional"""
+    buffer.flush()
+    text = codecs.getreader('utf-8-sig')(stream)
+    reader = pd.read_csv(
+        text, chunksize=CHUNK_POINTS, dtype=str,
+        usecols=lambda col: col.strip().lower() in CSV_COLUMNS
+    )
+    for chunk in reader:
+        chunk = chunk.rename(columns=lambda col: CSV_COLUMNS[col.strip().lower()])
+        if 'time' not in chunk:
+            raise ActivityImportError('CSV sem coluna de tempo (time/timestamp)')
+        if 'distance' not in chunk and not {'lat', 'lon'} <= set(chunk.columns):
+            raise ActivityImportError('CSV precisa de lat/lon ou distance')
+
+        missing = pd.Series(np.nan, index=chunk.index)
+        times, absolute = _to_seconds(chunk['time'])
+        buffer.summary.relative_time |= not absolute
+        buffer.summary.add_chunk(
+            times,
+            _to_float(chunk.get('lat', missing)), _to_float(chunk.get('lon', missing)),
+            _to_float(chunk.get('hr', missing)), _to_float(chunk.get('distance', missing))
+        )
+
+
+PARSERS = {'gpx': _parse_gpx, 'tcx': _parse_tcx, 'csv': _parse_csv}
+
+
+def summarize_activity(stream, fmt, filename=None):
+    """Lê o arquivo (stream binário) e retorna o ActivitySummary"""
+    if (filename or '').lower().endswith('.gz'):
+        stream = gzip.GzipFile(fileobj=stream)
+
+    summary = ActivitySummary()
+    buffer = _PointBuffer(summary)
+    try:
+        PARSERS[fmt](stream, buffer)
+        buffer.flush()
+    except ActivityImportError:
+        raise
+    except ET.ParseError as e:
+        raise ActivityImportError(f'Arquivo {fmt.upper()} inválido: {e}')
+    except (OSError, UnicodeDecodeError, pd.errors.ParserError) as e:
+        raise ActivityImportError(f'Não foi possível ler o arquivo: {e}')
+    except (pd.errors.OutOfBoundsDatetime, ValueError) as e:
+        # Datas fora do intervalo suportado ou valores que não convertem
+        raise ActivityImportError(f'Valores inválidos no arquivo: {e}')
+
+    if summary.points < 2 or summary.distance_m <= 0:
+        raise ActivityImportError('Atividade sem pontos suficientes para calcular distância')
+    return summary
+
+
+def match_workout(user_id, summary):
+    """Treino pendente mais parecido com a atividade, na primeira semana com pendências.
+
+    Compara distância e ritmo com o previsto; retorna None se nenhum treino
+    estiver dentro de ``MATCH_DISTANCE_TOLERANCE``.
+    """
+    pending = (Workout.user_id == user_id) & Workout.completed.is_not(True)
+    current_week = (
+        select(func.min(TrainingPlan.semana))
+        .join(Workout, Workout.training_plan_id == TrainingPlan.id)
+        .where(pending)
+        .scalar_subquery()
+    )
+    candidates = db.session.scalars(
+        select(Workout)
+        .join(TrainingPlan, Workout.training_plan_id == TrainingPlan.id)
+        .where(pending, TrainingPlan.user_id == user_id, TrainingPlan.semana == current_week)
+        .order_by(Workout.dia)
+    ).all()
+
+    data = summary.to_dict()
+    best, best_score = None, math.inf
+    for workout in candidates:
+        distance_error = abs(data['distancia_km'] - workout.distancia_km) / workout.distancia_km
+        if distance_error > MATCH_DISTANCE_TOLERANCE:
+            continue
+        pace_error = (
+            abs(data['ritmo_medio'] - workout.ritmo_alvo) / workout.ritmo_alvo
+            if data['ritmo_medio'] and workout.ritmo_alvo else 0.0
+        )
+        score = distance_error + 0.5 * pace_error
+        if score < best_score:
+            best, best_score = workout, score
+    return best
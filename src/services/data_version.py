@@ -0,0 +1,54 @@
+"""
+Versão dos dados de cada usuário (coluna users.data_version).
+
+Toda escrita que muda algo visível nas leituras de um usuário chama ``bump``
+na mesma transação (sem commit, como progress.record_*). As rotas GET usam a
+versão para montar a ETag e responder 304 sem refazer as consultas (ver
+src/routes/http_cache.py).
+
+``bump`` também anota quando cada usuário foi escrito neste processo (e, numa
+requisição, em ``g.written_users``): o roteamento para réplicas usa isso para
+mandar as leituras de quem acabou de escrever ao primário (src/routes/replica.py).
+"""
+import time
+
+from flask import g, has_request_context
+from sqlalchemy import func, select, update
+
+from src.models.user import db, User
+from src.services.cache import LRUCache
+
+# user_id -> time.monotonic() da última escrita neste processo
+_recent_writes = LRUCache(maxsize=65536)
+
+
+def bump(*user_ids):
+    """Incrementa a versão dos usuários informados"""
+    ids = {uid for uid in user_ids if uid is not None}
+    if not ids:
+        return
+    db.session.execute(
+        update(User).where(User.id.in_(ids)).values(data_version=func.coalesce(User.data_version, 0) + 1),
+        execution_options={'synchronize_session': False}
+    )
+    mark_written(*ids)
+
+
+def mark_written(*user_ids):
+    """Anota a escrita sem mudar a versão (ex: usuário recém-criado)"""
+    now = time.monotonic()
+    for uid in user_ids:
+        _recent_writes.set(uid, now)
+    if has_request_context():
+        g.written_users = g.get('written_users', set()) | set(user_ids)
+
+
+def written_within(user_id, seconds):
+    """Se este processo escreveu dados do usuário nos últimos ``seconds`` segundos"""
+    written_at = _recent_writes.get(user_id)
+    return written_at is not None and time.monotonic() - written_at < seconds
+
+
+def current(user_id):
+    """Versão atual (None se o usuário não existe)"""
+    return db.session.execute(select(User.data_version).where(User.id == user_id)).scalar_one_or_none()
@@ -0,0 +1,96 @@
+"""
+Armazenamento endereçado por conteúdo dos PDFs de exames.
+
+O upload é gravado em disco em blocos, à medida que o multipart é lido, com
+limite rígido de tamanho e SHA-256 calculado no caminho. O arquivo final se
+chama ``<sha256>.pdf``: PDFs idênticos são guardados uma única vez e
+referenciados por vários ``UserExam``. Como o arquivo final pode ser de outros
+registros, ele nunca é apagado por um upload que falhou: o upload fica no
+temporário até o registro ser gravado (``prepare`` -> commit -> ``store``).
+"""
+import hashlib
+import os
+import tempfile
+
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.formparser import parse_form_data
+
+
+class HashingFileWriter:
+    """Arquivo temporário que conta bytes e calcula o SHA-256 durante a escrita"""
+
+    def __init__(self, directory, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+        fd, self.temp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+        self._file = os.fdopen(fd, 'w+b')
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise RequestEntityTooLarge(f'Arquivo maior que {self.max_size // (1024 * 1024)}MB')
+        self.sha256.update(data)
+        return self._file.write(data)
+
+    def discard(self):
+        self._file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+    def __getattr__(self, name):
+        # seek/read/close/... usados pelo FileStorage do Werkzeug
+        return getattr(self._file, name)
+
+
+class ExamStorage:
+    def __init__(self, directory, max_file_size):
+        self.directory = directory
+        self.max_file_size = max_file_size
+        os.makedirs(directory, exist_ok=True)
+
+    def parse_upload(self, environ, form_overhead=64 * 1024):
+        """Lê o multipart da requisição gravando cada arquivo direto em disco.
+
+        Requisições com Content-Length acima do limite são rejeitadas antes de
+        ler o corpo. Retorna (form, files, writers); quem chama deve passar
+        cada writer para ``store`` ou ``discard``.
+        """
+        writers = []
+
+        def stream_factory(total_content_length, content_type, filename, content_length=None):
+            writer = HashingFileWriter(self.directory, self.max_file_size)
+            writers.append(writer)
+            return writer
+
+        try:
+            _, form, files = parse_form_data(
+                environ,
+                stream_factory=stream_factory,
+                max_content_length=self.max_file_size + form_overhead
+            )
+        except Exception:
+            for writer in writers:
+                writer.discard()
+            raise
+        return form, files, writers
+
+    def prepare(self, writer):
+        """Fecha o upload e calcula o nome final. Retorna (filename, sha256)"""
+        writer.close()
+        digest = writer.sha256.hexdigest()
+        return f"{digest}.pdf", digest
+
+    def store(self, writer, filename):
+        """Publica o upload como ``filename``, depois do commit do registro que o usa.
+
+        Se o mesmo conteúdo já está armazenado, o temporário é só descartado.
+        Retorna True se o arquivo foi criado.
+        """
+        path = os.path.join(self.directory, filename)
+        if os.path.exists(path):
+            writer.discard()
+            return False
+        # Atômico: uploads simultâneos do mesmo PDF substituem bytes idênticos
+        os.replace(writer.temp_path, path)
+        return True
@@ -0,0 +1,346 @@
+"""
+Métricas do processo (contadores, gauges e histogramas) no formato de texto do Prometheus.
+
+Cada processo acumula as métricas em memória. Com vários processos (workers do
+gunicorn, plan_worker.py) defina METRICS_DIR: uma thread de cada processo grava
+um snapshot ``<pid>.json`` nesse diretório até ``FLUSH_INTERVAL`` segundos
+depois de cada mudança (e ao sair), e ``render`` soma os snapshots de todos - o /metrics é o mesmo
+qualquer que seja o worker que atende a coleta. Contadores e histogramas de
+processos que já saíram continuam somando, para que nunca diminuam; gauges
+(estado atual, ex: conexões em uso) só contam processos vivos. O
+gunicorn.conf.py da raiz limpa o diretório quando o gunicorn inicia
+(``clear_snapshots``) e, quando um worker sai, junta o snapshot dele em
+``retired.json`` sem os gauges (``retire_snapshot``). Sem METRICS_DIR, o
+/metrics mostra só o processo que respondeu.
+"""
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+FLUSH_INTERVAL = 1.0  # segundos entre gravações do snapshot do processo
+RETIRED_SNAPSHOT = 'retired.json'  # contagens somadas dos processos que já saíram
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+PLAN_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Registry:
+    """Contadores, gauges e histogramas com rótulos, seguros entre threads"""
+
+    def __init__(self):
+        self.metrics = {}  # nome -> (tipo, descrição, rótulos, buckets)
+        self.values = {}  # nome -> {valores dos rótulos: float | [contagens por bucket..., soma]}
+        self.directory = None
+        self._dirty = False
+        self._flusher = None
+        self._lock = threading.Lock()
+        # Um worker criado por fork não herda as contagens do processo pai
+        os.register_at_fork(after_in_child=self._reset)
+        atexit.register(self.flush)
+
+    def counter(self, name, description, labels=()):
+        self.metrics[name] = ('counter', description, tuple(labels), None)
+        self.values[name] = {}
+        return name
+
+    def gauge(self, name, description, labels=()):
+        # Soma entre os processos vivos (ex: conexões em uso no total)
+        self.metrics[name] = ('gauge', description, tuple(labels), None)
+        self.values[name] = {}
+        return name
+
+    def histogram(self, name, description, labels=(), buckets=LATENCY_BUCKETS):
+        self.metrics[name] = ('histogram', description, tuple(labels), tuple(buckets))
+        self.values[name] = {}
+        return name
+
+    def configure(self, directory=None):
+        """Diretório dos snapshots compartilhado pelos processos (None = só este processo)"""
+        self.directory = directory or None
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def inc(self, name, labels=(), value=1.0):
+        self.record(increments=[(name, labels, value)])
+
+    def observe(self, name, labels, value):
+        self.record(observations=[(name, labels, value)])
+
+    def record(self, increments=(), observations=(), values=()):
+        """Aplica vários incrementos, observações e valores de gauges de uma vez (um só lock)"""
+        with self._lock:
+            for name, labels, value in values:
+                self.values[name][labels] = value
+            for name, labels, value in increments:
+                series = self.values[name]
+                series[labels] = series.get(labels, 0.0) + value
+            for name, labels, value in observations:
+                buckets = self.metrics[name][3]
+                series = self.values[name]
+                data = series.get(labels)
+                if data is None:
+                    data = series[labels] = [0] * (len(buckets) + 1) + [0.0]
+                data[bisect_left(buckets, value)] += 1  # le é inclusivo; o último é +Inf
+                data[-1] += value
+
+    def maybe_flush(self):
+        """Agenda a gravação do snapshot (feita pela thread, fora da requisição)"""
+        if not self.directory:
+            return
+        self._dirty = True
+        if self._flusher is None:
+            with self._lock:
+                if self._flusher is None:
+                    self._flusher = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+                    self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            if self._dirty:
+                try:
+                    self.flush()
+                except OSError as e:
+                    print(f"⚠️  Erro ao gravar métricas em {self.directory}: {e}")
+
+    def flush(self):
+        if not self.directory:
+            return
+        self._dirty = False
+        path = self._snapshot_path(os.getpid())
+        temp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self._snapshot(), f)
+        os.replace(temp_path, path)  # leitores nunca veem um arquivo pela metade
+
+    def render(self):
+        """Texto para o Prometheus com a soma de todos os processos"""
+        self.flush()
+        totals = self._snapshot()
+        if self.directory:
+            own = self._snapshot_path(os.getpid())
+            for path in glob.glob(os.path.join(self.directory, '*.json')):
+                if path == own:
+                    continue
+                snapshot = self._read_snapshot(path)
+                if snapshot is None:
+                    continue
+                if not _alive(_snapshot_pid(path)):
+                    snapshot = self._without_gauges(snapshot)
+                _merge(totals, snapshot)
+        return self._format(totals)
+
+    def clear_snapshots(self):
+        """Remove os snapshots do diretório (início do serviço, antes dos workers)"""
+        if not self.directory:
+            return
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def retire_snapshot(self, pid):
+        """Junta o snapshot do processo ``pid``, que saiu, em RETIRED_SNAPSHOT.
+
+        Chamado por um só processo (o master do gunicorn, em ``child_exit``):
+        contadores e histogramas continuam no total, os gauges do processo somem
+        e o diretório não cresce a cada worker reciclado.
+        """
+        if not self.directory:
+            return
+        path = self._snapshot_path(pid)
+        snapshot = self._read_snapshot(path)
+        if snapshot is None:
+            return
+        retired_path = os.path.join(self.directory, RETIRED_SNAPSHOT)
+        retired = self._read_snapshot(retired_path) or {}
+        _merge(retired, self._without_gauges(snapshot))
+        temp_path = f'{retired_path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(retired, f)
+        os.replace(temp_path, retired_path)
+        os.remove(path)
+
+    def _snapshot_path(self, pid):
+        return os.path.join(self.directory, f'{pid}.json')
+
+    def _read_snapshot(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None  # processo removido ou arquivo de outra versão
+
+    def _without_gauges(self, snapshot):
+        return {
+            name: series for name, series in snapshot.items()
+            if name in self.metrics and self.metrics[name][0] != 'gauge'
+        }
+
+    def _snapshot(self):
+        with self._lock:
+            return {
+                name: {json.dumps(labels): (list(v) if isinstance(v, list) else v) for labels, v in series.items()}
+                for name, series in self.values.items()
+            }
+
+    def _reset(self):
+        # A thread de gravação não sobrevive ao fork; o filho cria a sua
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._flusher = None
+        for series in self.values.values():
+            series.clear()
+
+    def _format(self, totals):
+        lines = []
+        for name, (kind, description, label_names, buckets) in self.metrics.items():
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+            for key in sorted(totals.get(name, {})):
+                value = totals[name][key]
+                labels = list(zip(label_names, json.loads(key)))
+                if kind != 'histogram':
+                    lines.append(f'{name}{_labels(labels)} {_number(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + ('+Inf',), value[:-1]):
+                    cumulative += count
+                    le = bound if bound == '+Inf' else _number(bound)
+                    lines.append(f'{name}_bucket{_labels(labels + [("le", le)])} {cumulative}')
+                lines.append(f'{name}_sum{_labels(labels)} {_number(value[-1])}')
+                lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+def _snapshot_pid(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return int(name) if name.isdigit() else None
+
+
+def _alive(pid):
+    """Processo ``pid`` ainda existe nesta máquina (None = snapshot sem processo)"""
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # existe, mas é de outro usuário
+    return True
+
+
+def _merge(totals, snapshot):
+    for name, series in snapshot.items():
+        target = totals.setdefault(name, {})
+        for key, value in series.items():
+            current = target.get(key)
+            if current is None:
+                target[key] = value
+            elif isinstance(current, list):
+                target[key] = [a + b for a, b in zip(current, value)]
+            else:
+                target[key] = current + value
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.counter(
+    'fitia_http_requests_total', 'Requisições atendidas', ('method', 'route', 'status'))
+HTTP_ERRORS = registry.counter(
+    'fitia_http_request_errors_total', 'Requisições com status 5xx', ('method', 'route'))
+HTTP_DURATION = registry.histogram(
+    'fitia_http_request_duration_seconds', 'Duração das requisições', ('method', 'route'), LATENCY_BUCKETS)
+DB_QUERIES = registry.histogram(
+    'fitia_db_queries_per_request', 'Consultas SQL por requisição', ('method', 'route'), QUERY_BUCKETS)
+DB_SECONDS = registry.counter(
+    'fitia_db_query_seconds_total', 'Tempo gasto em consultas SQL durante requisições', ('method', 'route'))
+DB_POOL_CHECKED_OUT = registry.gauge(
+    'fitia_db_pool_checked_out', 'Conexões do pool em uso', ('database',))
+DB_POOL_IDLE = registry.gauge(
+    'fitia_db_pool_idle', 'Conexões abertas e livres no pool', ('database',))
+DB_POOL_OVERFLOW = registry.gauge(
+    'fitia_db_pool_overflow', 'Conexões além de pool_size (negativo = ainda não abertas)', ('database',))
+DB_POOL_CONNECTS = registry.counter(
+    'fitia_db_pool_connections_total', 'Conexões novas abertas com o banco', ('database',))
+DB_POOL_INVALIDATED = registry.counter(
+    'fitia_db_pool_invalidated_total', 'Conexões descartadas (pre-ping ou erro de conexão)', ('database',))
+CACHE_LOOKUPS = registry.counter(
+    'fitia_cache_lookups_total', 'Consultas aos caches em memória do processo', ('cache', 'result'))
+PLAN_GENERATION = registry.histogram(
+    'fitia_plan_generation_duration_seconds', 'Duração da geração de planos (TrainingAIService)',
+    ('tipo',), PLAN_BUCKETS)
+
+
+def record_request(method, route, status, seconds, queries, db_seconds):
+    """Métricas de uma requisição (chamado pelo after_request do app)"""
+    labels = (method, route)
+    increments = [(HTTP_REQUESTS, (method, route, str(status)), 1.0), (DB_SECONDS, labels, db_seconds)]
+    if status >= 500:
+        increments.append((HTTP_ERRORS, labels, 1.0))
+    registry.record(increments, [(HTTP_DURATION, labels, seconds), (DB_QUERIES, labels, queries)])
+    registry.maybe_flush()
+
+
+def record_pool_state(database, pool, returning=False, connects=0, invalidated=0):
+    """Estado do pool após um checkout/checkin (QueuePool; outros pools só contam conexões).
+
+    O evento de checkin do SQLAlchemy chega antes de a conexão voltar para a
+    fila (``returning``): ela já conta como devolvida - livre, ou fechada se a
+    fila estiver cheia (conexão de overflow).
+    """
+    labels = (database,)
+    increments = []
+    if connects:
+        increments.append((DB_POOL_CONNECTS, labels, connects))
+    if invalidated:
+        increments.append((DB_POOL_INVALIDATED, labels, invalidated))
+    values = []
+    if hasattr(pool, 'checkedout'):
+        checked_out, idle, overflow = pool.checkedout(), pool.checkedin(), pool.overflow()
+        if returning:
+            checked_out -= 1
+            if idle < pool.size():
+                idle += 1
+            else:
+                overflow -= 1
+        values = [
+            (DB_POOL_CHECKED_OUT, labels, checked_out),
+            (DB_POOL_IDLE, labels, idle),
+            (DB_POOL_OVERFLOW, labels, overflow),
+        ]
+    registry.record(increments, values=values)
+    registry.maybe_flush()
+
+
+def record_cache_lookup(cache, hit):
+    """Acerto ou erro de um cache LRU (ex: 'pace', ritmos do TrainingAIService)"""
+    registry.inc(CACHE_LOOKUPS, (cache, 'hit' if hit else 'miss'))
+    registry.maybe_flush()
+
+
+def record_plan_generation(tipo, seconds):
+    """Duração de uma geração de planos: 'semana' ou 'temporada'"""
+    registry.observe(PLAN_GENERATION, (tipo,), seconds)
+    registry.maybe_flush()
@@ -0,0 +1,262 @@
+"""
+Fila de geração de planos no próprio banco (SQLite ou PostgreSQL), sem broker.
+
+A API grava um ``PlanJob`` e responde 202; threads de trabalho (no processo
+web ou em ``python plan_worker.py``) pegam o próximo job com um UPDATE
+condicional - só quem mudar a linha de 'queued' para 'running' fica com ele -
+e gravam o progresso a cada bloco de semanas. Jobs cujo worker morreu (sem
+renovar ``locked_at`` por ``JOB_LEASE_SECONDS``) voltam a ser elegíveis.
+"""
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from src.models.user import db, User, TrainingPlan, PlanJob
+from src.services import metrics
+from src.services.training_ai import user_plan_data
+
+JOB_LEASE_SECONDS = 300
+MAX_ATTEMPTS = 3
+POLL_INTERVAL = 2.0  # segundos entre consultas quando a fila está vazia
+SEASON_CHUNK_WEEKS = 4  # semanas gravadas (e progresso reportado) por commit
+CLAIM_RETRIES = 5
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+# Acorda as threads deste processo quando um job é enfileirado aqui
+_wakeup = threading.Event()
+
+
+def enqueue(user_id, semana=None):
+    """Enfileira a geração de uma semana (ou da temporada, se ``semana`` é None).
+
+    Se já houver um job ativo igual para o usuário, retorna ele - inclusive
+    quando outra requisição o cria ao mesmo tempo (o índice único parcial
+    uq_plan_jobs_user_target_active recusa o segundo INSERT).
+    Retorna (job, criado).
+    """
+    active = _active_job(user_id, semana)
+    if active:
+        return active, False
+
+    job = PlanJob(
+        user_id=user_id,
+        tipo='semana' if semana is not None else 'temporada',
+        semana=semana,
+        status='queued'
+    )
+    db.session.add(job)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        active = _active_job(user_id, semana)
+        if active is None:
+            raise
+        return active, False
+    _wakeup.set()
+    return job, True
+
+
+def _active_job(user_id, semana):
+    same_target = PlanJob.semana == semana if semana is not None else PlanJob.semana.is_(None)
+    return PlanJob.query.filter(
+        PlanJob.user_id == user_id, same_target, PlanJob.status.in_(ACTIVE_STATUSES)
+    ).order_by(PlanJob.id).first()
+
+
+def claim_next(worker):
+    """Reserva o job mais antigo da fila para ``worker``; None se não houver"""
+    for _ in range(CLAIM_RETRIES):
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=JOB_LEASE_SECONDS)
+        candidate = db.session.execute(
+            select(PlanJob.id, PlanJob.status, PlanJob.locked_at, PlanJob.attempts)
+            .where(or_(
+                PlanJob.status == 'queued',
+                and_(PlanJob.status == 'running', PlanJob.locked_at < stale)
+            ))
+            .order_by(PlanJob.id)
+            .limit(1)
+        ).first()
+        if candidate is None:
+            db.session.commit()
+            return None
+
+        # Compare-and-set: falha se outro worker alterou a linha entre o SELECT e o UPDATE
+        unchanged = [
+            PlanJob.id == candidate.id,
+            PlanJob.status == candidate.status,
+            PlanJob.locked_at == candidate.locked_at if candidate.locked_at else PlanJob.locked_at.is_(None)
+        ]
+        if candidate.status == 'running' and candidate.attempts >= MAX_ATTEMPTS:
+            values = {'status': 'failed', 'locked_at': None, 'finished_at': now,
+                      'error': 'Worker interrompido repetidamente'}
+        else:
+            values = {'status': 'running', 'worker': worker, 'locked_at': now,
+                      'attempts': PlanJob.attempts + 1,
+                      'started_at': db.func.coalesce(PlanJob.started_at, now)}
+
+        result = db.session.execute(
+            update(PlanJob).where(*unchanged).values(**values),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.commit()
+        if result.rowcount == 1 and values['status'] == 'running':
+            return db.session.get(PlanJob, candidate.id)
+    return None
+
+
+def run_job(job, service):
+    """Executa um job já reservado e grava o resultado (ou o erro)"""
+    job_id = job.id
+    try:
+        if job.tipo == 'semana':
+            result = _run_week(job, service)
+        else:
+            result = _run_season(job, service)
+        job.status = 'done'
+        job.result = json.dumps(result)
+        job.error = None
+    except Exception as e:
+        db.session.rollback()
+        print(f"⚠️  Job {job_id} falhou: {e}")
+        print(traceback.format_exc())
+        job = db.session.get(PlanJob, job_id)
+        job.status = 'queued' if job.attempts < MAX_ATTEMPTS else 'failed'
+        job.error = str(e)
+
+    job.locked_at = None
+    if job.status in ('done', 'failed'):
+        job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return job
+
+
+def _run_week(job, service):
+    exam_adjustments = service.analyze_medical_exams(job.user_id)
+    job.weeks_total = 1
+
+    plan = TrainingPlan.query.filter_by(user_id=job.user_id, semana=job.semana).first()
+    created = plan is None
+    if created:
+        try:
+            plan = service.generate_weekly_plan(job.user_id, job.semana)
+        except IntegrityError:
+            # Requisição síncrona criou a mesma semana
+            db.session.rollback()
+            plan = TrainingPlan.query.filter_by(user_id=job.user_id, semana=job.semana).first()
+            created = False
+        if plan is None:
+            raise ValueError('Erro ao gerar plano de treino. Verifique os dados do usuário.')
+
+    job.weeks_done = 1
+    return {
+        'training_plan_id': plan.id,
+        'weeks_created': [job.semana] if created else [],
+        'exam_adjustments': exam_adjustments
+    }
+
+
+def _run_season(job, service):
+    started = time.perf_counter()
+    user = db.session.get(User, job.user_id)
+    if user is None:
+        raise ValueError('Usuário não encontrado')
+    exam_adjustments = service.analyze_medical_exams(job.user_id)
+
+    existing = {
+        semana for (semana,) in
+        db.session.query(TrainingPlan.semana).filter_by(user_id=job.user_id)
+    }
+    missing = [week for week in range(1, user.semanas_treino + 1) if week not in existing]
+    job.weeks_total = len(missing)
+    job.weeks_done = 0
+    db.session.commit()
+
+    user_data = user_plan_data(user)
+    workouts_created = 0
+    for start in range(0, len(missing), SEASON_CHUNK_WEEKS):
+        plans = service.build_season_plan(user_data, missing[start:start + SEASON_CHUNK_WEEKS])
+        service.persist_season_plans(job.user_id, plans)
+        workouts_created += sum(len(plan['workouts']) for plan in plans)
+        job.weeks_done += len(plans)
+        job.locked_at = datetime.utcnow()  # renova a reserva
+        db.session.commit()
+    metrics.record_plan_generation('temporada', time.perf_counter() - started)
+
+    return {
+        'weeks_created': missing,
+        'workouts_created': workouts_created,
+        'exam_adjustments': exam_adjustments
+    }
+
+
+class PlanJobWorkerPool:
+    """Threads que drenam a fila de jobs dentro de um processo"""
+
+    def __init__(self, app, service, size=2, poll_interval=POLL_INTERVAL):
+        self.app = app
+        self.service = service
+        self.size = size
+        self.poll_interval = poll_interval
+        self.threads = []
+        self.started = False
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self.started:
+                return
+            self.started = True
+            for index in range(self.size):
+                thread = threading.Thread(
+                    target=self._run, args=(index,), name=f'plan-job-worker-{index}', daemon=True
+                )
+                thread.start()
+                self.threads.append(thread)
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        _wakeup.set()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def drain(self):
+        """Processa jobs na thread atual até a fila esvaziar. Retorna quantos rodou."""
+        worker = self._worker_name('drain')
+        processed = 0
+        with self.app.app_context():
+            while True:
+                job = claim_next(worker)
+                if job is None:
+                    return processed
+                run_job(job, self.service)
+                processed += 1
+
+    def _worker_name(self, suffix):
+        return f'{socket.gethostname()}:{os.getpid()}:{suffix}'
+
+    def _run(self, index):
+        worker = self._worker_name(index)
+        while not self._stop.is_set():
+            job = None
+            try:
+                with self.app.app_context():
+                    job = claim_next(worker)
+                    if job is not None:
+                        run_job(job, self.service)
+            except Exception as e:
+                print(f"⚠️  Erro no worker {worker}: {e}")
+            if job is None:
+                _wakeup.wait(self.poll_interval)
+                _wakeup.clear()
@@ -0,0 +1,157 @@
+"""
+Manutenção incremental da tabela user_progress.
+
+As funções ``record_*`` são chamadas dentro da mesma transação da escrita que
+alteram (geração de plano, conclusão de treino, feedback) e não fazem commit.
+``rebuild_user_progress`` recalcula os resumos do zero a partir das tabelas.
+"""
+import json
+from datetime import datetime
+
+from sqlalchemy import case, delete, func, insert, select, update
+
+from src.models.user import db, User, TrainingPlan, Workout, UserFeedback, UserProgress
+
+RECENT_FEEDBACK_LIMIT = 5
+
+
+def _increment(user_id, activity_at=None, **deltas):
+    """UPDATE atômico col = col + delta; recria o resumo se ele ainda não existir"""
+    now = datetime.utcnow()
+    values = {name: getattr(UserProgress, name) + delta for name, delta in deltas.items()}
+    values['updated_at'] = now
+    if activity_at is not None:
+        values['last_activity_at'] = case(
+            (UserProgress.last_activity_at.is_(None), activity_at),
+            (UserProgress.last_activity_at < activity_at, activity_at),
+            else_=UserProgress.last_activity_at
+        )
+
+    result = db.session.execute(
+        update(UserProgress).where(UserProgress.user_id == user_id).values(**values),
+        execution_options={'synchronize_session': False}
+    )
+    if result.rowcount == 0:
+        # Usuário sem resumo (ex: criado antes da migração): recalcular já
+        # inclui as alterações pendentes desta transação (autoflush)
+        rebuild_user_progress(user_id=user_id)
+
+
+def record_plans_created(user_id, plans, workouts):
+    """Planos e treinos novos gravados para o usuário"""
+    _increment(user_id, total_plans=plans, total_workouts=workouts)
+
+
+def record_workout_completed(user_id, distancia_km, completed_at):
+    """Treino que passou de pendente para completo"""
+    record_workouts_completed(user_id, 1, distancia_km, completed_at)
+
+
+def record_workouts_completed(user_id, count, distancia_km, completed_at):
+    """Vários treinos do usuário completados de uma vez (``distancia_km`` somada)"""
+    _increment(user_id, activity_at=completed_at, completed_workouts=count, completed_km=distancia_km or 0.0)
+
+
+def record_feedback(user_id, feedback):
+    """Atualiza a lista de feedbacks recentes com um feedback recém-adicionado.
+
+    A linha do resumo é travada (FOR UPDATE; no SQLite a escrita já é serial) e
+    a lista é relida da tabela de feedbacks, então dois envios simultâneos do
+    mesmo usuário não se sobrescrevem.
+    """
+    db.session.flush()
+    progress = db.session.scalars(
+        select(UserProgress).where(UserProgress.user_id == user_id)
+        .with_for_update().execution_options(populate_existing=True)
+    ).first()
+    if progress is None:
+        rebuild_user_progress(user_id=user_id)
+        return
+
+    recent = db.session.scalars(
+        select(UserFeedback).where(UserFeedback.user_id == user_id)
+        .order_by(UserFeedback.created_at.desc(), UserFeedback.id.desc())
+        .limit(RECENT_FEEDBACK_LIMIT)
+    ).all()
+    progress.recent_feedback = json.dumps([f.to_dict() for f in recent])
+    progress.updated_at = datetime.utcnow()
+    if progress.last_activity_at is None or feedback.created_at > progress.last_activity_at:
+        progress.last_activity_at = feedback.created_at
+
+
+def rebuild_user_progress(bind=None, user_id=None):
+    """Recalcula os resumos de todos os usuários (ou de um) a partir das tabelas.
+
+    ``bind`` pode ser uma sessão ou conexão (a migração usa a conexão dela).
+    Retorna quantos resumos foram gravados.
+    """
+    bind = bind if bind is not None else db.session
+
+    def scoped(stmt, column):
+        return stmt.where(column == user_id) if user_id is not None else stmt
+
+    user_ids = bind.execute(scoped(select(User.id), User.id)).scalars().all()
+
+    plans = dict(bind.execute(scoped(
+        select(TrainingPlan.user_id, func.count()).group_by(TrainingPlan.user_id),
+        TrainingPlan.user_id
+    )).all())
+
+    completed = Workout.completed.is_(True)
+    workouts = {
+        row.user_id: row for row in bind.execute(scoped(
+            select(
+                Workout.user_id,
+                func.count().label('total'),
+                func.sum(case((completed, 1), else_=0)).label('completed'),
+                func.sum(case((completed, Workout.distancia_km), else_=0.0)).label('km'),
+                func.max(Workout.completed_at).label('last_completed')
+            ).group_by(Workout.user_id),
+            Workout.user_id
+        ))
+    }
+
+    # Feedbacks mais recentes por usuário (função de janela: SQLite >= 3.25 e PostgreSQL)
+    ranked = scoped(
+        select(
+            UserFeedback.__table__,
+            func.row_number().over(
+                partition_by=UserFeedback.user_id,
+                order_by=(UserFeedback.created_at.desc(), UserFeedback.id.desc())
+            ).label('rank')
+        ),
+        UserFeedback.user_id
+    ).subquery()
+    feedback_columns = [ranked.c[col.name] for col in UserFeedback.__table__.columns]
+    recent = {}
+    for row in bind.execute(
+        select(*feedback_columns).where(ranked.c.rank <= RECENT_FEEDBACK_LIMIT)
+        .order_by(ranked.c.user_id, ranked.c.rank)
+    ):
+        feedback = UserFeedback(**row._mapping)
+        recent.setdefault(feedback.user_id, []).append(feedback)
+
+    now = datetime.utcnow()
+    rows = []
+    for uid in user_ids:
+        stats = workouts.get(uid)
+        feedbacks = recent.get(uid, [])
+        activity = [d for d in (
+            stats.last_completed if stats else None,
+            feedbacks[0].created_at if feedbacks else None
+        ) if d is not None]
+        rows.append({
+            'user_id': uid,
+            'total_plans': plans.get(uid, 0),
+            'total_workouts': stats.total if stats else 0,
+            'completed_workouts': int(stats.completed or 0) if stats else 0,
+            'completed_km': float(stats.km or 0.0) if stats else 0.0,
+            'last_activity_at': max(activity) if activity else None,
+            'recent_feedback': json.dumps([f.to_dict() for f in feedbacks]),
+            'updated_at': now
+        })
+
+    bind.execute(scoped(delete(UserProgress), UserProgress.user_id))
+    if rows:
+        bind.execute(insert(UserProgress), rows)
+    return len(rows)
@@ -1,9 +1,100 @@
-import numpy as np
-import pandas as pd
 import random
 import json
+import hashlib
+import copy
+import functools
+import time
 from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import aliased
 from src.models.user import User, TrainingPlan, Workout, UserFeedback, UserExam, db
+from src.services import data_version, metrics, progress
+from src.services.cache import LRUCache
+
+# Tabelas da geração de treinos, compiladas uma vez na importação do módulo
+# (fases como em get_training_phase). São listas Python; as versões NumPy do
+# caminho vetorizado são criadas no primeiro uso (ver _numpy_tables), para que
+# importar o serviço não carregue o NumPy.
+PHASES = ['base', 'construção', 'intensificação', 'tapering']
+PHASE_VOLUME_FACTORS = [0.7, 0.9, 1.0, 0.6]
+PHASE_DESCRIPTIONS = [
+    "Desenvolvimento da resistência básica",
+    "Aumento de volume e intensidade",
+    "Trabalho específico de ritmo",
+    "Redução de volume para recuperação",
+]
+WORKOUT_TYPES = ['regenerativo', 'fácil', 'longo', 'progressivo', 'fartlek', 'tempo', 'intervalo', 'ritmo']
+PHASE_INDEX = {phase: i for i, phase in enumerate(PHASES)}
+WORKOUT_INDEX = {tipo: i for i, tipo in enumerate(WORKOUT_TYPES)}
+WORKOUT_SHARES = [0.15, 0.2, 0.35, 0.25, 0.25, 0.2, 0.15, 0.2]
+# Ajuste de distância por fase (linhas) e tipo de treino (colunas)
+PHASE_DISTANCE_ADJUST = [[1.0] * len(WORKOUT_TYPES) for _ in PHASES]
+for _phase, (_longo, _ritmo) in enumerate(zip([0.9, 1.0, 1.1, 0.7], [0.7, 0.8, 1.0, 0.8])):
+    PHASE_DISTANCE_ADJUST[_phase][WORKOUT_INDEX['longo']] = _longo
+    PHASE_DISTANCE_ADJUST[_phase][WORKOUT_INDEX['ritmo']] = _ritmo
+# Coeficientes fase x tipo: distância = volume_semanal * performance_factor * coeficiente
+DISTANCE_COEFFICIENTS = [
+    [share * adjust for share, adjust in zip(WORKOUT_SHARES, row)]
+    for row in PHASE_DISTANCE_ADJUST
+]
+# Ritmo alvo de cada tipo (linhas) como combinação dos ritmos de PACE_KEYS (colunas)
+PACE_KEYS = ('ritmo_facil', 'ritmo_longo', 'ritmo_tempo', 'ritmo_intervalo', 'ritmo_ritmo')
+PACE_WEIGHTS = [
+    [1.1, 0.0, 0.0, 0.0, 0.0],  # regenerativo
+    [1.0, 0.0, 0.0, 0.0, 0.0],  # fácil
+    [0.0, 1.0, 0.0, 0.0, 0.0],  # longo
+    [0.5, 0.0, 0.5, 0.0, 0.0],  # progressivo
+    [0.0, 0.0, 0.0, 1.0, 0.0],  # fartlek
+    [0.0, 0.0, 1.0, 0.0, 0.0],  # tempo
+    [0.0, 0.0, 0.0, 1.0, 0.0],  # intervalo
+    [0.0, 0.0, 0.0, 0.0, 1.0],  # ritmo
+]
+# Termos não nulos de cada linha, para o caminho escalar de generate_workout
+_PACE_TERMS = [
+    [(key, weight) for key, weight in zip(PACE_KEYS, row) if weight]
+    for row in PACE_WEIGHTS
+]
+WORKOUT_DESCRIPTIONS = {
+    'regenerativo': 'Corrida regenerativa para recuperação ativa',
+    'fácil': 'Corrida contínua em ritmo conversável',
+    'longo': 'Corrida longa para desenvolvimento de resistência',
+    'progressivo': 'Corrida que inicia fácil e termina em ritmo moderado',
+    'fartlek': 'Treino de velocidade com variações de ritmo livre',
+    'tempo': 'Treino contínuo no limiar de lactato',
+    'intervalo': 'Repetições de alta intensidade com recuperação',
+    'ritmo': 'Treino específico no ritmo de prova',
+}
+VOLUME_CAPS = {'iniciante': 35, 'intermediário': 50}
+VOLUME_CAP_DEFAULT = 70  # avançado
+MIN_WORKOUT_KM = 3.0
+# Campos do usuário que determinam os ritmos de treino
+PACE_INPUTS = ('teste_5km_tempo', 'tempo_objetivo_min', 'distancia_objetivo')
+# Campos do usuário usados na geração de planos
+PLAN_INPUTS = ('id', 'nivel', 'semanas_treino', 'dias_semana', 'performance_factor') + PACE_INPUTS
+
+
+# Tipos de exame considerados por analyze_medical_exams
+ANALYZED_EXAM_TYPES = ('bioimpedancia', 'espirometria', 'vo2max')
+# Granularidade do performance_factor na chave dos templates de semana
+PERFORMANCE_FACTOR_BUCKET = 0.01
+
+
+@functools.lru_cache(maxsize=None)
+def _numpy_tables():
+    """(np, fatores de volume, coeficientes de distância, pesos de ritmo) como arrays"""
+    import numpy as np
+    return np, np.array(PHASE_VOLUME_FACTORS), np.array(DISTANCE_COEFFICIENTS), np.array(PACE_WEIGHTS)
+
+
+def performance_factor_bucket(performance_factor):
+    """Arredonda o fator para a granularidade usada nos templates de semana"""
+    factor = performance_factor or 1.0
+    return round(round(factor / PERFORMANCE_FACTOR_BUCKET) * PERFORMANCE_FACTOR_BUCKET, 4)
+
+
+def user_plan_data(user):
+    """Dict apenas com os campos do usuário que a geração de planos usa"""
+    return {field: getattr(user, field) for field in PLAN_INPUTS}
 
 class TrainingAIService:
     def __init__(self):
@@ -13,6 +104,15 @@ class TrainingAIService:
             'intensificação': ['fácil', 'longo', 'tempo', 'intervalo', 'ritmo', 'regenerativo'],
             'tapering': ['fácil', 'longo', 'tempo', 'regenerativo', 'fartlek']
         }
+        # Semanas já calculadas, por hash do perfil (plan_template_key)
+        self.plan_templates = LRUCache(maxsize=8192)
+        # Ajustes de analyze_medical_exams por usuário. Cada worker tem seu cache e
+        # a invalidação só alcança o processo que gravou o exame; o TTL limita
+        # o atraso nos demais
+        self.exam_adjustments_cache = LRUCache(maxsize=4096, ttl=300)
+        # Ritmos calculados, por combinação de PACE_INPUTS. A chave são os próprios
+        # campos, então alterar o perfil já cai em outra entrada (nada a invalidar)
+        self.pace_cache = LRUCache(maxsize=4096)
     
     def calculate_training_paces(self, user_data):
         """Calcula os ritmos de treino baseado no teste de 5km e objetivo"""
@@ -59,6 +159,25 @@ class TrainingAIService:
             'ritmo_objetivo': ritmo_objetivo
         }
     
+    def get_training_paces(self, user):
+        """Ritmos de treino com cache LRU pelos campos que os determinam.
+        
+        ``user`` pode ser um ``User`` ou um dict com os campos (como ``User.to_dict``).
+        """
+        if isinstance(user, dict):
+            inputs = {field: user[field] for field in PACE_INPUTS}
+        else:
+            inputs = {field: getattr(user, field) for field in PACE_INPUTS}
+        
+        key = tuple(inputs[field] for field in PACE_INPUTS)
+        ritmos = self.pace_cache.get(key)
+        metrics.record_cache_lookup('pace', hit=ritmos is not None)
+        if ritmos is None:
+            ritmos = self.calculate_training_paces(inputs)
+            self.pace_cache.set(key, ritmos)
+        
+        return dict(ritmos)
+    
     def get_training_phase(self, week_number, total_weeks):
         """Define a fase de treinamento baseado na semana"""
         if week_number <= total_weeks * 0.25:
@@ -72,164 +191,251 @@ class TrainingAIService:
     
     def generate_workout(self, workout_type, week_number, phase, volume_semanal, ritmos, performance_factor):
         """Gera diferentes tipos de treino baseado no tipo especificado"""
-        # Volume base para cada tipo de treino
-        base_volumes = {
-            'regenerativo': volume_semanal * 0.15,
-            'fácil': volume_semanal * 0.2,
-            'longo': volume_semanal * 0.35,
-            'progressivo': volume_semanal * 0.25,
-            'fartlek': volume_semanal * 0.25,
-            'tempo': volume_semanal * 0.2,
-            'intervalo': volume_semanal * 0.15,
-            'ritmo': volume_semanal * 0.2
-        }
+        # Fases desconhecidas usam os ajustes do tapering
+        tipo = WORKOUT_INDEX[workout_type]
+        coeficiente = DISTANCE_COEFFICIENTS[PHASE_INDEX.get(phase, len(PHASES) - 1)][tipo]
         
-        # Definir treinos específicos para cada tipo
-        workouts = {
-            'regenerativo': {
-                'tipo': 'regenerativo',
-                'descricao': 'Corrida regenerativa para recuperação ativa',
-                'distancia_km': base_volumes['regenerativo'] * performance_factor,
-                'ritmo_alvo': ritmos['ritmo_facil'] * 1.1
-            },
-            'fácil': {
-                'tipo': 'fácil',
-                'descricao': 'Corrida contínua em ritmo conversável',
-                'distancia_km': base_volumes['fácil'] * performance_factor,
-                'ritmo_alvo': ritmos['ritmo_facil']
-            },
-            'longo': {
-                'tipo': 'longo',
-                'descricao': 'Corrida longa para desenvolvimento de resistência',
-                'distancia_km': base_volumes['longo'] * performance_factor,
-                'ritmo_alvo': ritmos['ritmo_longo']
-            },
-            'progressivo': {
-                'tipo': 'progressivo',
-                'descricao': 'Corrida que inicia fácil e termina em ritmo moderado',
-                'distancia_km': base_volumes['progressivo'] * performance_factor,
-                'ritmo_alvo': (ritmos['ritmo_facil'] + ritmos['ritmo_tempo']) / 2
-            },
-            'fartlek': {
-                'tipo': 'fartlek',
-                'descricao': 'Treino de velocidade com variações de ritmo livre',
-                'distancia_km': base_volumes['fartlek'] * performance_factor,
-                'ritmo_alvo': ritmos['ritmo_intervalo']
-            },
-            'tempo': {
-                'tipo': 'tempo',
-                'descricao': 'Treino contínuo no limiar de lactato',
-                'distancia_km': base_volumes['tempo'] * performance_factor,
-                'ritmo_alvo': ritmos['ritmo_tempo']
-            },
-            'intervalo': {
-                'tipo': 'intervalo',
-                'descricao': 'Repetições de alta intensidade com recuperação',
-                'distancia_km': base_volumes['intervalo'] * performance_factor,
-                'ritmo_alvo': ritmos['ritmo_intervalo']
-            },
-            'ritmo': {
-                'tipo': 'ritmo',
-                'descricao': 'Treino específico no ritmo de prova',
-                'distancia_km': base_volumes['ritmo'] * performance_factor,
-                'ritmo_alvo': ritmos['ritmo_ritmo']
-            }
+        return {
+            'tipo': workout_type,
+            'descricao': WORKOUT_DESCRIPTIONS[workout_type],
+            'distancia_km': max(MIN_WORKOUT_KM, volume_semanal * performance_factor * coeficiente),
+            'ritmo_alvo': sum(ritmos[key] * weight for key, weight in _PACE_TERMS[tipo])
         }
-        
-        # Ajustar baseado na fase de treinamento
-        if phase == "base":
-            workouts['longo']['distancia_km'] *= 0.9
-            workouts['ritmo']['distancia_km'] *= 0.7
-        elif phase == "construção":
-            workouts['longo']['distancia_km'] *= 1.0
-            workouts['ritmo']['distancia_km'] *= 0.8
-        elif phase == "intensificação":
-            workouts['longo']['distancia_km'] *= 1.1
-            workouts['ritmo']['distancia_km'] *= 1.0
-        else:  # tapering
-            workouts['longo']['distancia_km'] *= 0.7
-            workouts['ritmo']['distancia_km'] *= 0.8
-        
-        # Garantir que a distância mínima seja respeitada
-        for workout in workouts.values():
-            workout['distancia_km'] = max(3.0, workout['distancia_km'])
-        
-        return workouts[workout_type]
     
     def generate_weekly_plan(self, user_id, week_number):
         """Gera o plano de treino para a semana especificada"""
+        started = time.perf_counter()
         user = User.query.get(user_id)
         if not user:
             return None
         
-        # Determinar a fase de treinamento
-        phase, volume_factor, intensity_factor, phase_desc = self.get_training_phase(
-            week_number, user.semanas_treino
-        )
+        # Fase, volume, tipos sorteados e treinos da semana (template em cache)
+        plan = self.build_season_plan(user_plan_data(user), [week_number])[0]
         
-        # Calcular volume base para a semana
-        volume_base = 20 + (week_number * 3)
-        volume_semanal = volume_base * volume_factor * user.performance_factor
+        # Criar o plano de treino no banco de dados
+        training_plan = TrainingPlan(
+            user_id=user_id,
+            semana=week_number,
+            fase=plan['fase'],
+            fase_desc=plan['fase_desc'],
+            volume_total=plan['volume_total']
+        )
+        db.session.add(training_plan)
+        db.session.flush()  # Para obter o ID
         
-        # Limitar volume máximo baseado no nível do usuário
-        if user.nivel == 'iniciante':
-            volume_semanal = min(volume_semanal, 35)
-        elif user.nivel == 'intermediário':
-            volume_semanal = min(volume_semanal, 50)
-        else:  # avançado
-            volume_semanal = min(volume_semanal, 70)
+        for treino in plan['workouts']:
+            db.session.add(Workout(
+                user_id=user_id,
+                training_plan_id=training_plan.id,
+                **treino
+            ))
         
-        # Calcular ritmos de treino
-        user_data = user.to_dict()
-        ritmos = self.calculate_training_paces(user_data)
+        progress.record_plans_created(user_id, 1, len(plan['workouts']))
+        data_version.bump(user_id)
+        db.session.commit()
+        metrics.record_plan_generation('semana', time.perf_counter() - started)
         
-        # Selecionar tipos de treino para a semana
+        return training_plan
+    
+    def workout_paces(self, ritmos):
+        """Ritmo alvo de cada tipo de treino, na ordem de WORKOUT_TYPES"""
+        np, _, _, pace_weights = _numpy_tables()
+        return pace_weights @ np.array([ritmos[key] for key in PACE_KEYS])
+    
+    def select_workout_types(self, phase, dias_semana, rng=random):
+        """Sorteia os tipos de treino da semana (sempre com um longo e um regenerativo)"""
         available_workouts = self.training_types[phase]
-        selected_workouts = random.sample(
+        selected_workouts = rng.sample(
             available_workouts, 
-            min(user.dias_semana, len(available_workouts))
+            min(dias_semana, len(available_workouts))
         )
         
-        # Garantir que sempre tenha um longo e um regenerativo
         if 'longo' not in selected_workouts:
             selected_workouts[0] = 'longo'
         if 'regenerativo' not in selected_workouts:
             selected_workouts[-1] = 'regenerativo'
         
-        # Criar o plano de treino no banco de dados
-        training_plan = TrainingPlan(
-            user_id=user_id,
-            semana=week_number,
-            fase=phase,
-            fase_desc=phase_desc,
-            volume_total=volume_semanal
+        return selected_workouts
+    
+    def plan_template_key(self, user_data, week_number, phase):
+        """Hash do perfil que determina completamente uma semana de treino.
+        
+        Atletas com o mesmo perfil compartilham o template da semana, e o hash
+        também é a semente do sorteio dos treinos.
+        """
+        profile = [
+            phase, int(week_number), user_data['dias_semana'], user_data['nivel'],
+            performance_factor_bucket(user_data.get('performance_factor'))
+        ] + [user_data[field] for field in PACE_INPUTS]
+        return hashlib.sha256(json.dumps(profile).encode('utf-8')).hexdigest()
+    
+    def build_season_plan(self, user_data, weeks=None):
+        """Calcula todas as semanas da temporada de uma vez, sem acessar o banco.
+        
+        ``user_data`` é um dict com os campos do usuário (ver ``user_plan_data``).
+        Semanas cujo perfil já está em ``plan_templates`` são reaproveitadas; as
+        demais são calculadas juntas. Retorna uma lista de dicts de plano, cada
+        um com a lista de ``workouts``.
+        """
+        np = _numpy_tables()[0]
+        total_weeks = user_data['semanas_treino']
+        if weeks is None:
+            weeks = range(1, total_weeks + 1)
+        weeks = np.asarray(list(weeks), dtype=int)
+        if weeks.size == 0:
+            return []
+        
+        # Fase de cada semana (mesmos limites de get_training_phase)
+        phase_idx = np.select(
+            [weeks <= total_weeks * 0.25, weeks <= total_weeks * 0.6, weeks <= total_weeks * 0.85],
+            [0, 1, 2],
+            default=3
         )
-        db.session.add(training_plan)
-        db.session.flush()  # Para obter o ID
         
-        # Gerar cada treino individualmente
-        workouts = []
-        for i, workout_type in enumerate(selected_workouts):
-            treino = self.generate_workout(
-                workout_type, week_number, phase, volume_semanal, 
-                ritmos, user.performance_factor
-            )
-            
-            workout = Workout(
-                user_id=user_id,
-                training_plan_id=training_plan.id,
-                dia=i+1,
-                tipo=treino['tipo'],
-                distancia_km=round(treino['distancia_km'], 1),
-                ritmo_alvo=treino['ritmo_alvo'],
-                descricao=treino['descricao']
+        keys = [
+            self.plan_template_key(user_data, week, PHASES[p])
+            for week, p in zip(weeks, phase_idx)
+        ]
+        templates = [self.plan_templates.get(key) for key in keys]
+        missing = [i for i, template in enumerate(templates) if template is None]
+        if missing:
+            computed = self._compute_week_templates(
+                user_data, weeks[missing], phase_idx[missing], [keys[i] for i in missing]
             )
-            db.session.add(workout)
-            workouts.append(workout)
+            for i, template in zip(missing, computed):
+                self.plan_templates.set(keys[i], template)
+                templates[i] = template
+        
+        return [
+            dict(template, workouts=[dict(workout) for workout in template['workouts']])
+            for template in templates
+        ]
+    
+    def _compute_week_templates(self, user_data, weeks, phase_idx, keys):
+        """Calcula as semanas com arrays NumPy (fases, volumes, limites e distâncias)"""
+        np, phase_volume_factors, distance_coefficients, _ = _numpy_tables()
+        performance_factor = performance_factor_bucket(user_data.get('performance_factor'))
+        
+        # Volume semanal com limite por nível
+        volume_cap = VOLUME_CAPS.get(user_data['nivel'], VOLUME_CAP_DEFAULT)
+        volumes = (20 + weeks * 3) * phase_volume_factors[phase_idx] * performance_factor
+        volumes = np.minimum(volumes, volume_cap)
+        
+        # Tipos sorteados por semana (semente = hash do perfil), em uma matriz
+        # semanas x dias (-1 = sem treino)
+        selections = [
+            self.select_workout_types(PHASES[p], user_data['dias_semana'], random.Random(int(key[:16], 16)))
+            for p, key in zip(phase_idx, keys)
+        ]
+        max_days = max(len(sel) for sel in selections)
+        type_idx = np.full((len(weeks), max_days), -1)
+        for row, sel in enumerate(selections):
+            type_idx[row, :len(sel)] = [WORKOUT_INDEX[t] for t in sel]
+        mask = type_idx >= 0
+        safe_idx = np.where(mask, type_idx, 0)
+        
+        # Distância de cada treino: coeficiente (fase, tipo) x volume x fator
+        distances = (
+            distance_coefficients[phase_idx[:, None], safe_idx]
+            * volumes[:, None]
+            * performance_factor
+        )
+        distances = np.round(np.maximum(distances, MIN_WORKOUT_KM), 1)
+        
+        # Ritmo alvo por tipo de treino
+        ritmos = self.get_training_paces(user_data)
+        paces = self.workout_paces(ritmos)[safe_idx]
+        
+        templates = []
+        for row, week in enumerate(weeks):
+            workouts = []
+            for day in range(max_days):
+                if not mask[row, day]:
+                    continue
+                tipo = WORKOUT_TYPES[type_idx[row, day]]
+                workouts.append({
+                    'dia': day + 1,
+                    'tipo': tipo,
+                    'distancia_km': float(distances[row, day]),
+                    'ritmo_alvo': float(paces[row, day]),
+                    'descricao': WORKOUT_DESCRIPTIONS[tipo]
+                })
+            templates.append({
+                'semana': int(week),
+                'fase': PHASES[phase_idx[row]],
+                'fase_desc': PHASE_DESCRIPTIONS[phase_idx[row]],
+                'volume_total': float(volumes[row]),
+                'workouts': tuple(workouts)
+            })
+        
+        return templates
+    
+    def persist_season_plans(self, user_id, plans):
+        """Grava planos e treinos com dois INSERTs em lote (sem commit).
+        
+        Planos que trazem a chave ``user_id`` (lotes de vários atletas) usam
+        esse valor no lugar de ``user_id``.
+        """
+        if not plans:
+            return []
+        
+        plan_rows = [
+            {
+                'user_id': plan.get('user_id', user_id),
+                'semana': plan['semana'],
+                'fase': plan['fase'],
+                'fase_desc': plan['fase_desc'],
+                'volume_total': plan['volume_total']
+            }
+            for plan in plans
+        ]
+        plan_ids = db.session.execute(
+            insert(TrainingPlan).returning(TrainingPlan.id, sort_by_parameter_order=True),
+            plan_rows
+        ).scalars().all()
+        
+        workout_rows = [
+            dict(workout, user_id=plan.get('user_id', user_id), training_plan_id=plan_id)
+            for plan_id, plan in zip(plan_ids, plans)
+            for workout in plan['workouts']
+        ]
+        if workout_rows:
+            db.session.execute(insert(Workout), workout_rows)
+        
+        # Atualizar os resumos de progresso de cada atleta do lote
+        counts = {}
+        for plan in plans:
+            uid = plan.get('user_id', user_id)
+            n_plans, n_workouts = counts.get(uid, (0, 0))
+            counts[uid] = (n_plans + 1, n_workouts + len(plan['workouts']))
+        for uid, (n_plans, n_workouts) in counts.items():
+            progress.record_plans_created(uid, n_plans, n_workouts)
+        data_version.bump(*counts)
+        
+        return plan_ids
+    
+    def generate_season_plan(self, user_id):
+        """Gera todas as semanas ainda sem plano em uma única transação"""
+        started = time.perf_counter()
+        user = User.query.get(user_id)
+        if not user:
+            return None
+        
+        existing_weeks = {
+            semana for (semana,) in
+            db.session.query(TrainingPlan.semana).filter_by(user_id=user_id)
+        }
+        missing_weeks = [
+            week for week in range(1, user.semanas_treino + 1)
+            if week not in existing_weeks
+        ]
         
+        plans = self.build_season_plan(user_plan_data(user), missing_weeks)
+        self.persist_season_plans(user_id, plans)
         db.session.commit()
+        metrics.record_plan_generation('temporada', time.perf_counter() - started)
         
-        return training_plan
+        return plans
     
     def update_performance_factor(self, user_id, feedback_data):
         """Atualiza o fator de performance baseado no feedback do usuário"""
@@ -281,6 +487,8 @@ class TrainingAIService:
         # Limitar ajustes para não mudanças muito bruscas
         user.performance_factor = max(0.7, min(1.3, novo_fator))
         
+        progress.record_feedback(user_id, feedback)
+        data_version.bump(user_id)
         db.session.commit()
         
         return user.performance_factor
@@ -294,28 +502,23 @@ class TrainingAIService:
             'recommendations': []
         }
         
+        cached = self.exam_adjustments_cache.get(user_id)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
         try:
-            # Buscar exames mais recentes de cada tipo
-            bioimpedancia = UserExam.query.filter_by(
-                user_id=user_id, 
-                tipo_exame='bioimpedancia'
-            ).order_by(UserExam.data_exame.desc()).first()
-            
-            espirometria = UserExam.query.filter_by(
-                user_id=user_id, 
-                tipo_exame='espirometria'
-            ).order_by(UserExam.data_exame.desc()).first()
-            
-            vo2max = UserExam.query.filter_by(
-                user_id=user_id, 
-                tipo_exame='vo2max'
-            ).order_by(UserExam.data_exame.desc()).first()
+            # Buscar exames mais recentes de cada tipo (uma única consulta)
+            latest = self.latest_exams(user_id)
         except Exception as e:
             # Se houver erro ao consultar exames (ex: coluna não existe ainda),
             # retornar ajustes padrão sem quebrar o fluxo
             print(f"Aviso: Não foi possível analisar exames médicos: {e}")
             return adjustments
         
+        bioimpedancia = latest.get('bioimpedancia')
+        espirometria = latest.get('espirometria')
+        vo2max = latest.get('vo2max')
+        
         # Análise de Bioimpedância
         if bioimpedancia:
             dados = json.loads(bioimpedancia.dados_exame) if isinstance(bioimpedancia.dados_exame, str) else bioimpedancia.dados_exame
@@ -389,8 +592,36 @@ class TrainingAIService:
                     f"Limiar anaeróbico em {limiar_percent:.0f}% do VO2max. Ajustando zonas de treino."
                 )
         
+        self.exam_adjustments_cache.set(user_id, copy.deepcopy(adjustments))
         return adjustments
     
+    def latest_exams_query(self, user_id):
+        """SELECT do exame mais recente de cada tipo analisado.
+        
+        Usa ROW_NUMBER() particionado por tipo (SQLite >= 3.25 e PostgreSQL).
+        """
+        ranked = select(
+            UserExam,
+            func.row_number().over(
+                partition_by=UserExam.tipo_exame,
+                order_by=(UserExam.data_exame.desc(), UserExam.id.desc())
+            ).label('rank')
+        ).where(
+            UserExam.user_id == user_id,
+            UserExam.tipo_exame.in_(ANALYZED_EXAM_TYPES)
+        ).subquery()
+        latest = aliased(UserExam, ranked)
+        return select(latest).where(ranked.c.rank == 1)
+    
+    def latest_exams(self, user_id):
+        """Exame mais recente de cada tipo analisado: dict tipo_exame -> UserExam"""
+        exams = db.session.execute(self.latest_exams_query(user_id)).scalars()
+        return {exam.tipo_exame: exam for exam in exams}
+    
+    def invalidate_exam_adjustments(self, user_id):
+        """Descarta os ajustes em cache do usuário (chamar ao gravar um exame)"""
+        self.exam_adjustments_cache.pop(user_id)
+    
     def apply_exam_adjustments(self, user_id, training_plan_data):
         """Aplica ajustes baseados em exames médicos ao plano de treino"""
         adjustments = self.analyze_medical_exams(user_id)
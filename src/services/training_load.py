@@ -0,0 +1,287 @@
+"""
+Carga de treino: sRPE, TRIMP e as médias exponenciais ATL/CTL/TSB.
+
+A carga de cada treino completo é somada ao dia em que ele foi feito (tabela
+training_load). ATL (7 dias) e CTL (42 dias) são médias exponenciais da carga
+diária; em dias sem treino elas apenas decaem, então basta guardar os dias com
+treino. Completar um treino atualiza o dia dele (e os dias seguintes, em geral
+nenhum) a partir da última linha anterior - sem recalcular o histórico.
+Usuários com treinos completos mas sem nenhuma linha (banco atualizado sem o
+preenchimento da migração) são recalculados na primeira leitura ou escrita
+que não encontra nenhuma linha (``ensure_history``), como o user_progress.
+``rebuild_training_load`` recalcula tudo com pandas, vetorizado sobre todos os
+usuários (``ewm`` por usuário numa grade diária; migração, CLI e gerador).
+
+NumPy e pandas são importados dentro das funções que calculam cargas, para
+que importar o módulo (feito pelas rotas na inicialização) continue barato.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select
+
+from src.models.user import db, User, Workout, TrainingLoad
+
+ATL_DAYS = 7
+CTL_DAYS = 42
+EMA_ALPHAS = {'atl': 1 / ATL_DAYS, 'ctl': 1 / CTL_DAYS}
+LOAD_METRICS = ('srpe', 'trimp')
+EMA_COLUMNS = tuple(f'{prefix}_{metric}' for metric in LOAD_METRICS for prefix in EMA_ALPHAS)
+
+FC_REPOUSO_PADRAO = 60  # bpm - o perfil não guarda a FC de repouso
+TRIMP_COEFICIENTES = {'M': (0.64, 1.92), 'F': (0.86, 1.67)}  # Banister
+
+DEFAULT_WINDOW_DAYS = 90
+MAX_WINDOW_DAYS = 730
+
+
+def fc_maxima(idade):
+    """FC máxima estimada (Tanaka: 208 - 0,7 x idade)"""
+    import numpy as np
+    return 208 - 0.7 * np.asarray(idade, dtype=float)
+
+
+def session_loads(rpe, duracao_min, fc_media, idade, sexo):
+    """sRPE (RPE x minutos) e TRIMP de Banister; aceita escalares ou arrays.
+
+    Sessões sem RPE ou sem FC têm a carga correspondente zero.
+    """
+    import numpy as np
+    rpe, duracao, fc = (np.asarray(v, dtype=float) for v in (rpe, duracao_min, fc_media))
+    srpe = np.nan_to_num(rpe * duracao)
+
+    reserva = np.clip((fc - FC_REPOUSO_PADRAO) / (fc_maxima(idade) - FC_REPOUSO_PADRAO), 0.0, 1.0)
+    feminino = np.char.upper(np.asarray(sexo, dtype=str)) == 'F'
+    a = np.where(feminino, TRIMP_COEFICIENTES['F'][0], TRIMP_COEFICIENTES['M'][0])
+    b = np.where(feminino, TRIMP_COEFICIENTES['F'][1], TRIMP_COEFICIENTES['M'][1])
+    trimp = np.nan_to_num(duracao * reserva * a * np.exp(b * reserva))
+    return srpe, trimp
+
+
+def session_of(completed, completed_at, rpe, tempo_realizado, fc_media, distancia_km, ritmo_alvo):
+    """(data, rpe, duração, fc) de um treino completo, ou None.
+
+    Sem tempo registrado, a duração é estimada pela distância e ritmo alvo.
+    """
+    if not completed or completed_at is None:
+        return None
+    duracao = tempo_realizado if tempo_realizado else distancia_km * ritmo_alvo
+    return (completed_at.date(), rpe, duracao, fc_media)
+
+
+def workout_session(workout):
+    return session_of(workout.completed, workout.completed_at, workout.rpe_realizado,
+                      workout.tempo_realizado, workout.fc_media, workout.distancia_km, workout.ritmo_alvo)
+
+
+def record_sessions(user_id, changes):
+    """Aplica mudanças de treinos do usuário: lista de (sessão antes, sessão depois).
+
+    Chamado na mesma transação da escrita, sem commit (como progress.record_*).
+    """
+    changes = [(before, after) for before, after in changes if before != after]
+    if not changes:
+        return
+
+    import numpy as np
+    user = db.session.get(User, user_id)
+    deltas = defaultdict(lambda: np.zeros(2))
+    for before, after in changes:
+        for session, sign in ((before, -1.0), (after, 1.0)):
+            if session is not None:
+                srpe, trimp = session_loads(*session[1:], user.idade, user.sexo)
+                deltas[session[0]] += sign * np.array([float(srpe), float(trimp)])
+    new_sessions = sum(1 for before, after in changes if before is None and after is not None)
+    _apply_deltas(user_id, deltas, new_sessions)
+
+
+def ensure_history(user_id, new_sessions=0):
+    """Recalcula o usuário se ele tem treinos completos mas nenhuma linha gravada.
+
+    Chamado só quando uma consulta já voltou vazia, para não custar nada no caso
+    comum. ``new_sessions`` treinos completos desta transação não contam: um
+    usuário cujo único histórico são eles segue pelo caminho incremental.
+    Retorna True se recalculou (sem commit; recalcular já inclui as alterações
+    pendentes da transação, por autoflush).
+    """
+    if db.session.scalar(select(TrainingLoad.data).where(TrainingLoad.user_id == user_id).limit(1)) is not None:
+        return False
+    completed = db.session.scalar(
+        select(func.count()).select_from(Workout)
+        .where(Workout.user_id == user_id, Workout.completed.is_(True), Workout.completed_at.is_not(None))
+    )
+    if completed <= new_sessions:
+        return False
+    db.session().use_primary()  # recalculado a partir do primário, mesmo numa leitura de réplica
+    rebuild_training_load(user_id=user_id)
+    return True
+
+
+def _advance(previous, day, srpe, trimp):
+    """ATL/CTL do dia ``day`` a partir da linha anterior (decaimento nos dias sem treino)"""
+    gap = (day - previous.data).days if previous is not None else 0
+    values = {}
+    for metric, load in (('srpe', srpe), ('trimp', trimp)):
+        for prefix, alpha in EMA_ALPHAS.items():
+            column = f'{prefix}_{metric}'
+            base = getattr(previous, column) * (1 - alpha) ** gap if previous is not None else 0.0
+            values[column] = base + alpha * load
+    return values
+
+
+def _apply_deltas(user_id, deltas, new_sessions=0):
+    first = min(deltas)
+    previous = db.session.scalars(
+        select(TrainingLoad)
+        .where(TrainingLoad.user_id == user_id, TrainingLoad.data < first)
+        .order_by(TrainingLoad.data.desc())
+        .limit(1)
+    ).first()
+    rows = {
+        row.data: row for row in db.session.scalars(
+            select(TrainingLoad).where(TrainingLoad.user_id == user_id, TrainingLoad.data >= first)
+        )
+    }
+
+    if previous is None and not rows and ensure_history(user_id, new_sessions):
+        return
+
+    for day, (srpe, trimp) in deltas.items():
+        row = rows.get(day)
+        if row is None:
+            row = rows[day] = TrainingLoad(user_id=user_id, data=day, srpe=0.0, trimp=0.0)
+            db.session.add(row)
+        row.srpe = max(row.srpe + srpe, 0.0)
+        row.trimp = max(row.trimp + trimp, 0.0)
+
+    # Reencadear a partir do primeiro dia alterado
+    now = datetime.utcnow()
+    for day in sorted(rows):
+        row = rows[day]
+        for column, value in _advance(previous, day, row.srpe, row.trimp).items():
+            setattr(row, column, value)
+        row.updated_at = now
+        previous = row
+
+
+def rebuild_training_load(bind=None, user_id=None):
+    """Recalcula a tabela training_load a partir dos treinos completos.
+
+    ``bind`` pode ser uma sessão ou conexão (a migração usa a conexão dela).
+    Retorna quantas linhas (usuário, dia) foram gravadas.
+    """
+    import numpy as np
+    import pandas as pd
+    bind = bind if bind is not None else db.session
+
+    stmt = (
+        select(Workout.user_id, Workout.completed_at, Workout.rpe_realizado, Workout.tempo_realizado,
+               Workout.fc_media, Workout.distancia_km, Workout.ritmo_alvo, User.idade, User.sexo)
+        .join(User, User.id == Workout.user_id)
+        .where(Workout.completed.is_(True), Workout.completed_at.is_not(None))
+    )
+    clear = delete(TrainingLoad)
+    if user_id is not None:
+        stmt = stmt.where(Workout.user_id == user_id)
+        clear = clear.where(TrainingLoad.user_id == user_id)
+
+    sessions = pd.DataFrame(bind.execute(stmt).all(), columns=[
+        'user_id', 'completed_at', 'rpe', 'tempo', 'fc', 'distancia_km', 'ritmo_alvo', 'idade', 'sexo'
+    ])
+    bind.execute(clear)
+    if sessions.empty:
+        return 0
+
+    tempo = pd.to_numeric(sessions['tempo'], errors='coerce')
+    duracao = tempo.where(tempo > 0, sessions['distancia_km'] * sessions['ritmo_alvo'])
+    sessions['srpe'], sessions['trimp'] = session_loads(
+        sessions['rpe'].astype(float), duracao, sessions['fc'].astype(float),
+        sessions['idade'], sessions['sexo']
+    )
+    sessions['data'] = pd.to_datetime(sessions['completed_at']).dt.normalize()
+    daily = sessions.groupby(['user_id', 'data'])[list(LOAD_METRICS)].sum()
+
+    # Grade diária contínua de cada usuário, do dia anterior ao primeiro treino
+    # (médias em zero) até o último; as médias exponenciais saem de uma vez
+    # para todos os usuários e só os dias com treino são gravados
+    days = daily.index.get_level_values('data')
+    span = pd.DataFrame({'first': days, 'last': days}, index=daily.index.get_level_values('user_id'))
+    span = span.groupby(level=0).agg({'first': 'min', 'last': 'max'})
+    span['first'] -= pd.Timedelta(days=1)
+    lengths = ((span['last'] - span['first']).dt.days + 1).to_numpy()
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    grid_index = pd.MultiIndex.from_arrays([
+        np.repeat(span.index.to_numpy(), lengths),
+        pd.DatetimeIndex(np.repeat(span['first'].to_numpy(), lengths)) + pd.to_timedelta(offsets, unit='D'),
+    ], names=['user_id', 'data'])
+    grid = daily.reindex(grid_index, fill_value=0.0)
+
+    by_user = grid.groupby(level='user_id', sort=False)
+    for metric in LOAD_METRICS:
+        for prefix, alpha in EMA_ALPHAS.items():
+            ema = by_user[metric].ewm(alpha=alpha, adjust=False).mean()
+            grid[f'{prefix}_{metric}'] = ema.droplevel(0)
+
+    loads = grid.loc[daily.index, list(LOAD_METRICS + EMA_COLUMNS)].reset_index()
+    loads['user_id'] = loads['user_id'].astype(int)
+    loads['data'] = loads['data'].dt.date
+    loads['updated_at'] = datetime.utcnow()
+    rows = loads.to_dict('records')
+
+    bind.execute(insert(TrainingLoad), rows)
+    return len(rows)
+
+
+def _stored_window(user_id, start, end):
+    """Linhas de ``start`` a ``end`` e a última linha anterior a ``start``"""
+    columns = [TrainingLoad.data, *(getattr(TrainingLoad, c) for c in LOAD_METRICS + EMA_COLUMNS)]
+    anchor = db.session.execute(
+        select(*columns)
+        .where(TrainingLoad.user_id == user_id, TrainingLoad.data < start)
+        .order_by(TrainingLoad.data.desc())
+        .limit(1)
+    ).all()
+    window = db.session.execute(
+        select(*columns)
+        .where(TrainingLoad.user_id == user_id, TrainingLoad.data >= start, TrainingLoad.data <= end)
+        .order_by(TrainingLoad.data)
+    ).all()
+    return anchor, window
+
+
+def load_series(user_id, dias=DEFAULT_WINDOW_DAYS, ate=None):
+    """Série diária dos últimos ``dias`` dias até ``ate`` (hoje, UTC).
+
+    Lê só as linhas da janela e a última linha anterior a ela; os dias sem
+    treino são preenchidos pelo decaimento exponencial. Sem nenhuma linha, o
+    usuário pode ser recalculado (``ensure_history``; o commit fica com a rota).
+    """
+    import pandas as pd
+    end = pd.Timestamp(ate or datetime.utcnow().date())
+    start = end - pd.Timedelta(days=dias - 1)
+
+    anchor, window = _stored_window(user_id, start.date(), end.date())
+    if not anchor and not window and ensure_history(user_id):
+        anchor, window = _stored_window(user_id, start.date(), end.date())
+
+    days = pd.date_range(start, end, freq='D')
+    stored = pd.DataFrame(anchor + window, columns=['data', *LOAD_METRICS, *EMA_COLUMNS])
+    stored.index = pd.to_datetime(stored.pop('data'))
+
+    series = stored[list(LOAD_METRICS)].reindex(days, fill_value=0.0)
+    timeline = stored.index.union(days)
+    state = stored[list(EMA_COLUMNS)].reindex(timeline).ffill().fillna(0.0).loc[days]
+    last_row = pd.Series(stored.index, index=stored.index).reindex(timeline).ffill().loc[days]
+    gap = ((days - pd.DatetimeIndex(last_row)) / pd.Timedelta(days=1)).fillna(0.0).to_numpy()
+
+    for metric in LOAD_METRICS:
+        for prefix, alpha in EMA_ALPHAS.items():
+            column = f'{prefix}_{metric}'
+            series[column] = state[column].to_numpy() * (1 - alpha) ** gap
+        series[f'tsb_{metric}'] = series[f'ctl_{metric}'] - series[f'atl_{metric}']
+
+    series = series.round(1)
+    return [
+        {'data': day.date().isoformat(), **{k: float(v) for k, v in values.items()}}
+        for day, values in series.iterrows()
+    ]
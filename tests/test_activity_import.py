@@ -0,0 +1,42 @@
+"""
+Regressões do import de atividades em CSV (src/services/activity_import.py).
+"""
+import io
+
+import pytest
+
+from src.services.activity_import import ActivityImportError, summarize_activity
+
+
+def _csv(rows):
+    return io.BytesIO(('\n'.join(rows) + '\n').encode())
+
+
+def test_csv_com_segundos_decorridos():
+    # 1200 pontos a 1 s e 3 m/s: passa de 999 s, onde o tempo virava data do ano 1000
+    rows = ['time,heart_rate,distance'] + [f'{i},{140 + i % 10},{i * 3}' for i in range(1200)]
+    summary = summarize_activity(_csv(rows), 'csv')
+
+    assert summary.points == 1200
+    assert summary.distance_m == pytest.approx(1199 * 3)
+    assert summary.moving_s == pytest.approx(1199)
+    assert summary.end_datetime is None
+    data = summary.to_dict()
+    assert data['inicio'] is None and data['fim'] is None
+
+
+def test_csv_com_epoch_em_milissegundos():
+    start = 1_777_620_000_000
+    rows = ['time,distance'] + [f'{start + i * 1000},{i * 3}' for i in range(600)]
+    summary = summarize_activity(_csv(rows), 'csv')
+
+    assert summary.moving_s == pytest.approx(599)
+    assert summary.end_datetime is not None
+    assert summary.end_datetime.year == 2026
+
+
+@pytest.mark.parametrize('value', ['ontem de manhã', '2026-13-45T25:00:00Z'])
+def test_csv_com_tempo_invalido(value):
+    rows = ['time,distance'] + [f'{value},{i * 3}' for i in range(10)]
+    with pytest.raises(ActivityImportError, match='Tempo não reconhecido'):
+        summarize_activity(_csv(rows), 'csv')
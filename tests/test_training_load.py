@@ -0,0 +1,112 @@
+"""
+rebuild_training_load (vetorizado) contra a média exponencial por usuário do pandas.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import delete, select
+
+from src.app import create_app
+from src.models.user import db, User, Workout, TrainingLoad
+from src.services.training_load import (
+    EMA_ALPHAS, EMA_COLUMNS, LOAD_METRICS, rebuild_training_load, session_loads
+)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'fitia.db'}",
+        'METRICS_ENABLED': False,
+    })
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+def _expected(sessions):
+    """Referência: grade diária por usuário e ``ewm(adjust=False)``, usuário a usuário"""
+    daily = sessions.groupby(['user_id', 'data'])[list(LOAD_METRICS)].sum()
+    frames = []
+    for uid, loads in daily.groupby(level='user_id'):
+        loads = loads.droplevel('user_id')
+        days = pd.date_range(loads.index.min() - pd.Timedelta(days=1), loads.index.max(), freq='D')
+        series = loads.reindex(days, fill_value=0.0)
+        for metric in LOAD_METRICS:
+            for prefix, alpha in EMA_ALPHAS.items():
+                series[f'{prefix}_{metric}'] = series[metric].ewm(alpha=alpha, adjust=False).mean()
+        frames.append(series.loc[loads.index].assign(user_id=uid))
+    return pd.concat(frames).rename_axis('data').reset_index()
+
+
+def _create_sessions(rng, users=12):
+    """Usuários com treinos completos; retorna as cargas esperadas por sessão"""
+    start = datetime(2025, 1, 1, 7, 0)
+    sessions = []
+    for i in range(users):
+        user = User(idade=int(rng.integers(18, 60)), peso=70, sexo='MF'[i % 2], nivel='intermediário',
+                    distancia_objetivo=10, tempo_objetivo_min=50, semanas_treino=8, dias_semana=4,
+                    teste_5km_tempo=25, teste_5km_fc_media=170, teste_5km_rpe=8)
+        db.session.add(user)
+        db.session.flush()
+        # Intervalos irregulares, vários treinos no mesmo dia e treinos sem RPE/FC
+        offset = int(rng.integers(0, 30))
+        for _ in range(int(rng.integers(1, 40))):
+            offset += int(rng.choice([0, 1, 2, 3, 10, 60]))
+            rpe = None if rng.random() < 0.1 else int(rng.integers(3, 10))
+            fc = None if rng.random() < 0.1 else float(rng.integers(120, 185))
+            tempo = float(rng.integers(20, 90))
+            completed_at = start + timedelta(days=offset, hours=int(rng.integers(0, 12)))
+            db.session.add(Workout(user_id=user.id, dia=1, tipo='leve', distancia_km=8, ritmo_alvo=6,
+                                   descricao='', completed=True, rpe_realizado=rpe, fc_media=fc,
+                                   tempo_realizado=tempo, completed_at=completed_at))
+            srpe, trimp = session_loads(rpe if rpe is not None else np.nan, tempo,
+                                        fc if fc is not None else np.nan, user.idade, user.sexo)
+            sessions.append({'user_id': user.id, 'data': pd.Timestamp(completed_at.date()),
+                             'srpe': float(srpe), 'trimp': float(trimp)})
+    db.session.commit()
+    return pd.DataFrame(sessions)
+
+
+def _stored(columns):
+    return pd.DataFrame(
+        db.session.execute(select(
+            TrainingLoad.user_id, TrainingLoad.data, *(getattr(TrainingLoad, c) for c in columns)
+        ).order_by(TrainingLoad.user_id, TrainingLoad.data)).all(),
+        columns=['user_id', 'data', *columns]
+    )
+
+
+def test_rebuild_igual_ao_ewm_por_usuario(app):
+    sessions = _create_sessions(np.random.default_rng(42))
+
+    written = rebuild_training_load()
+    db.session.commit()
+
+    expected = _expected(sessions)
+    columns = list(LOAD_METRICS + EMA_COLUMNS)
+    stored = _stored(columns)
+    assert written == len(expected) == len(stored)
+    assert stored['user_id'].tolist() == expected['user_id'].tolist()
+    assert stored['data'].tolist() == expected['data'].dt.date.tolist()
+    np.testing.assert_allclose(stored[columns].to_numpy(), expected[columns].to_numpy(), rtol=1e-9, atol=1e-9)
+
+
+def test_leitura_recalcula_usuario_sem_historico(app):
+    # Banco atualizado sem o preenchimento da migração: treinos completos, nenhuma linha
+    sessions = _create_sessions(np.random.default_rng(7), users=2)
+    user_id = int(sessions['user_id'].iloc[0])
+    db.session.execute(delete(TrainingLoad))
+    db.session.commit()
+
+    response = app.test_client().get(f'/api/users/{user_id}/load?dias=730')
+    assert response.status_code == 200
+
+    expected = _expected(sessions[sessions['user_id'] == user_id])
+    stored = _stored(list(EMA_COLUMNS))
+    assert stored['user_id'].unique().tolist() == [user_id]
+    np.testing.assert_allclose(stored[list(EMA_COLUMNS)].to_numpy(), expected[list(EMA_COLUMNS)].to_numpy(),
+                               rtol=1e-9, atol=1e-9)